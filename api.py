@@ -0,0 +1,115 @@
+import json
+import math
+import os
+import threading
+from collections import deque
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from dotenv import load_dotenv
+from logs import get_logger
+
+# Settings below are read at import, which can happen before the importer loads .env
+load_dotenv()
+
+log = get_logger('api')
+
+# Loopback by default; the API is unauthenticated, so bind it to the Tailscale address to
+# share it, and only use 0.0.0.0 (every interface, including the facility LAN) deliberately
+API_HOST = os.getenv("API_HOST", "127.0.0.1")
+API_PORT = int(os.getenv("API_PORT", 8080))
+API_BUFFER_SIZE = int(os.getenv("API_BUFFER_SIZE", 960))  # 10 days at 15 minute intervals
+
+# serve_forever wakes every poll interval only to check for shutdown(), which is never
+# called here; a long interval keeps the idle server from waking the CPU between requests
+API_POLL_INTERVAL = 3600  # seconds
+
+class SampleRing:
+    """
+    Bounded in-memory ring of the most recent samples.
+    Each sample is serialised once on arrival so requests only join cached bytes.
+    """
+    def __init__(self, size=API_BUFFER_SIZE):
+        self.entries = deque(maxlen=size)  # (measured_at datetime, JSON bytes)
+        self.lock = threading.Lock()
+
+    def append(self, reading):
+        # Non-finite values (e.g. an infinite RSD) are not valid JSON
+        clean = {k: None if isinstance(v, float) and not math.isfinite(v) else v for k, v in reading.to_dict().items()}
+        entry = (datetime.fromisoformat(reading.measured_at), json.dumps(clean).encode())
+        with self.lock:
+            self.entries.append(entry)
+
+    def latest(self):
+        with self.lock:
+            return self.entries[-1][1] if self.entries else None
+
+    def last(self, n):
+        with self.lock:
+            entries = list(self.entries)
+        return [data for _, data in entries[-n:]] if n > 0 else []
+
+    def since(self, timestamp):
+        with self.lock:
+            entries = list(self.entries)
+        # Entries arrive in measurement order, so walk back from the newest
+        result = []
+        for measured_at, data in reversed(entries):
+            if measured_at <= timestamp:
+                break
+            result.append(data)
+        result.reverse()
+        return result
+
+def _handler(ring):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            query = parse_qs(url.query)
+
+            if url.path == '/latest':
+                data = ring.latest()
+                if data is None:
+                    return self._send(404, b'{"error":"No samples yet"}')
+                return self._send(200, data)
+
+            if url.path == '/samples':
+                try:
+                    if 'since' in query:
+                        # A literal '+' in the UTC offset decodes to a space
+                        since = datetime.fromisoformat(query['since'][0].replace(' ', '+'))
+                        if since.tzinfo is None:
+                            return self._send(400, b'{"error":"since must include a UTC offset"}')
+                        samples = ring.since(since)
+                    else:
+                        samples = ring.last(int(query.get('n', ['1'])[0]))
+                except ValueError:
+                    return self._send(400, b'{"error":"Invalid query"}')
+                return self._send(200, b'[' + b','.join(samples) + b']')
+
+            self._send(404, b'{"error":"Not found"}')
+
+        def _send(self, status, body):
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # Keep request logs out of the journal
+
+    return Handler
+
+def start(host=API_HOST, port=API_PORT, size=API_BUFFER_SIZE):
+    """
+    Start the read API in a background thread.
+    Endpoints: `/latest`, `/samples?n=N` and `/samples?since=<ISO 8601 timestamp>`.
+    :return: The SampleRing the API serves from; append Readings to it
+    """
+    ring = SampleRing(size)
+    server = ThreadingHTTPServer((host, port), _handler(ring))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, kwargs={'poll_interval': API_POLL_INTERVAL}, daemon=True).start()
+    log.info("Read API listening", host=host, port=port, buffer_size=size)
+    return ring
@@ -0,0 +1,232 @@
+import requests
+import sys
+import os
+import csv
+import json
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from time import perf_counter, sleep
+from dotenv import load_dotenv
+from encoding import encode_sample, encode_batch
+from stream import subscribe
+from reading import Reading
+import api
+from logs import get_logger, process_usage
+
+load_dotenv()
+
+log = get_logger('consumer')
+
+SUPABASE_URL = os.getenv("SUPABASE_URL")
+SUPABASE_ANON_KEY = os.getenv("SUPABASE_ANON_KEY")
+
+# How long an upload waits for its DO prediction before going out without it
+PREDICTION_DEADLINE = float(os.getenv("PREDICTION_DEADLINE", 5))  # seconds
+
+# Duty-cycled mode for solar/battery sites: uploads are attempted once per tick, and samples
+# that fail wait for the next tick's wake window instead of retrying with backoff in between
+DUTY_CYCLE = os.getenv("DUTY_CYCLE", "0") == "1"
+UPLOAD_RETRIES = 1 if DUTY_CYCLE else 5
+UPLOAD_BACKLOG_LIMIT = 960  # Samples kept for upload while offline (10 days at 15 minutes)
+
+def log_sample(reading):
+    path = "data/samples.csv"
+    file_exists = os.path.isfile(path)
+
+    with open(path, mode='a', newline='') as file:
+        writer = csv.writer(file)
+
+        if not file_exists:
+            writer.writerow(Reading.FIELDS)
+
+        writer.writerow(reading.to_row())
+
+# On-time predictions are logged from the handler thread and late ones from the follow-up thread
+_prediction_log_lock = threading.Lock()
+
+def log_prediction(reading, latency, on_time):
+    path = "data/predictions.csv"
+
+    with _prediction_log_lock:
+        file_exists = os.path.isfile(path)
+
+        with open(path, mode='a', newline='') as file:
+            writer = csv.writer(file)
+
+            if not file_exists:
+                writer.writerow(['device_id', 'measured_at', 'predicted_dissolved_oxygen', 'latency_ms', 'on_time'])
+
+            writer.writerow([reading.device_id, reading.measured_at, reading.predicted_dissolved_oxygen, f"{latency * 1000:.3f}", on_time])
+
+def post_to_function(function, data, description, max_retries=UPLOAD_RETRIES, base_backoff=2, gzip=False):
+    """
+    POST a payload to a Supabase edge function, retrying with exponential backoff.
+    :param gzip: The payload is gzip-compressed (see encoding.encode_batch)
+    :return: True if the payload was accepted
+    """
+    url = f"{SUPABASE_URL}/functions/v1/{function}"
+
+    headers = {
+        "Authorization": f"Bearer {SUPABASE_ANON_KEY}",
+        "Content-Type": "application/json"
+    }
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+
+    for attempt in range(max_retries):
+        try:
+            response = requests.post(url, data=data, headers=headers, timeout=10)
+            response.raise_for_status()
+            log.info(f"{description} sent", function=function, attempt=attempt + 1)
+            return True
+        except Exception as e:
+            if attempt == max_retries - 1:
+                log.error(f"{description} not sent, max retries reached", function=function, attempts=max_retries, error=e)
+                return False
+            backoff_time = base_backoff * (2 ** attempt)
+            log.warning("Send failed, retrying", function=function, attempt=attempt + 1, max_retries=max_retries, backoff=backoff_time, error=e)
+            sleep(backoff_time)
+
+def send_sample(reading, max_retries=UPLOAD_RETRIES, base_backoff=2):
+    return post_to_function("insert-sample", encode_sample(reading), "Sample", max_retries, base_backoff)
+
+def start_batch_sender():
+    """
+    Set up duty-cycled uploads: one request per tick. A sample that fails to upload is kept and
+    goes out with the next tick's sample as one gzip batch, so the network is only used inside
+    the sampler's wake window. The oldest samples are dropped beyond UPLOAD_BACKLOG_LIMIT.
+    :return: Per-sample upload function
+    """
+    backlog = deque(maxlen=UPLOAD_BACKLOG_LIMIT)
+
+    def send(reading):
+        if len(backlog) == backlog.maxlen:
+            log.warning("Upload backlog full, dropping oldest sample", measured_at=backlog[0].measured_at)
+        backlog.append(reading)
+
+        if len(backlog) == 1:
+            sent = send_sample(reading, max_retries=1)
+        else:
+            sent = post_to_function(
+                "insert-sample", encode_batch(list(backlog)), f"Batch of {len(backlog)} samples", max_retries=1, gzip=True
+            )
+
+        if sent:
+            backlog.clear()
+        else:
+            log.warning("Upload deferred to the next tick", backlog=len(backlog))
+
+    return send
+
+def send_prediction(reading, max_retries=UPLOAD_RETRIES, base_backoff=2):
+    """Send a late DO prediction as an update to an already uploaded sample."""
+    data = json.dumps({
+        "device_id": reading.device_id,
+        "measured_at": reading.measured_at,
+        "predicted_dissolved_oxygen": reading.predicted_dissolved_oxygen
+    })
+    post_to_function("update-prediction", data, "DO prediction", max_retries, base_backoff)
+
+def start_uploader():
+    """
+    Set up the uploader with DO prediction as a pipeline stage.
+    The model is loaded once and predictions run in a worker thread. Each sample waits at most
+    PREDICTION_DEADLINE seconds for its prediction; if the deadline is missed the sample is
+    uploaded without it and the prediction follows as an update once it completes.
+    With DUTY_CYCLE set, samples are uploaded through start_batch_sender.
+    :return: Per-sample handler
+    """
+    upload = start_batch_sender() if DUTY_CYCLE else send_sample
+
+    # Imported here so the model stack (joblib, scikit-learn) can only break the uploader
+    try:
+        from predict_DO.predict_DisOx import load_model, predict_do_from_reading
+        model = load_model()
+    except Exception as e:
+        log.error("DO model failed to load, uploading samples without predictions", error=e)
+        return upload
+
+    predictor = ThreadPoolExecutor(max_workers=1)
+    follow_ups = ThreadPoolExecutor(max_workers=1)
+
+    def predict(reading):
+        start = perf_counter()
+        value = predict_do_from_reading(reading, model)
+        return value, perf_counter() - start
+
+    def follow_up(reading, future):
+        try:
+            value, latency = future.result()
+        except Exception as e:
+            log.warning("DO prediction failed", measured_at=reading.measured_at, error=e)
+            return
+        reading.predicted_dissolved_oxygen = value
+        log_prediction(reading, latency, on_time=False)
+        log.info("DO predicted after deadline", measured_at=reading.measured_at, predicted_dissolved_oxygen=value, latency_ms=latency * 1000)
+        send_prediction(reading)
+
+    def handle(reading):
+        if None in (reading.temperature, reading.ph, reading.turbidity, reading.total_dissolved_solids):
+            log.warning("Missing sensor values, skipping DO prediction", measured_at=reading.measured_at)
+            return upload(reading)
+
+        future = predictor.submit(predict, reading)
+        try:
+            value, latency = future.result(timeout=PREDICTION_DEADLINE)
+        except FutureTimeoutError:
+            log.warning("DO prediction missed deadline, uploading without it", measured_at=reading.measured_at, deadline=PREDICTION_DEADLINE)
+            upload(reading)
+            future.add_done_callback(lambda f: follow_ups.submit(follow_up, reading, f))
+            return
+        except Exception as e:
+            log.warning("DO prediction failed", measured_at=reading.measured_at, error=e)
+            return upload(reading)
+
+        reading.predicted_dissolved_oxygen = value
+        log_prediction(reading, latency, on_time=True)
+        log.info("DO predicted", measured_at=reading.measured_at, predicted_dissolved_oxygen=value, latency_ms=latency * 1000)
+        upload(reading)
+
+    return handle
+
+# Each consumer runs as its own process: `python consumer.py <name>`.
+# Values are setup functions that run once at startup and return the per-sample handler.
+CONSUMERS = {
+    'logger': lambda: log_sample,
+    'uploader': start_uploader,
+    'api': lambda: api.start().append,
+}
+
+def main():
+    if len(sys.argv) != 2 or sys.argv[1] not in CONSUMERS:
+        print(f"Usage: python consumer.py <{'|'.join(CONSUMERS)}>")
+        sys.exit(2)
+
+    name = sys.argv[1]
+    handle = CONSUMERS[name]()
+    log.info("Consumer started", consumer=name)
+
+    try:
+        cpu_start, switches_start = process_usage()
+        for reading in subscribe():
+            try:
+                handle(reading)
+            except Exception as e:
+                # A bad sample must not take the consumer down
+                log.error("Consumer failed on sample", consumer=name, measured_at=reading.measured_at, exc_info=e)
+
+            # Cost of this consumer per sample, including its idle time since the previous one
+            cpu_end, switches_end = process_usage()
+            log.info(
+                "Sample handled", consumer=name, measured_at=reading.measured_at,
+                cpu_s=cpu_end - cpu_start, wakeups=switches_end - switches_start
+            )
+            cpu_start, switches_start = cpu_end, switches_end
+    except KeyboardInterrupt:
+        log.info("Consumer interrupted by user", consumer=name)
+    finally:
+        log.info("Consumer stopped", consumer=name)
+
+if __name__ == "__main__":
+    main()
@@ -6,18 +6,13 @@ set -e  # Exit on any error
 REPO_URL="https://github.com/Aahil52/sensor-system.git"
 VENV_DIR=".venv"
 SERVICE_FILE="sensor-system-sampler.service"
+CONSUMER_SERVICE_FILE="sensor-system-consumer@.service"
+CONSUMERS="logger uploader api"
 
 log() {
     echo "[INFO] $1"
 }
 
-if systemctl is-active --quiet $SERVICE_FILE; then
-    log "Service is running. Stopping it for update..."
-    sudo systemctl stop "$SERVICE_FILE"
-else
-    log "Service is not running."
-fi
-
 if [ ! -d "$VENV_DIR" ]; then
     log "Virtual environment not found. Creating..."
     python3 -m venv "$VENV_DIR"
@@ -29,6 +24,15 @@ log "Installing/updating Python dependencies..."
 "$VENV_DIR/bin/pip" install --upgrade pip
 "$VENV_DIR/bin/pip" install -r requirements.txt
 
+# Checked before stopping anything, so a failed check leaves the running services untouched
+log "Checking that the DO model loads with the installed scikit-learn..."
+if ! "$VENV_DIR/bin/python" -c "from predict_DO.predict_DisOx import load_model; load_model()"; then
+    log "The DO model failed to load. Pin scikit-learn in requirements.txt to the version"
+    log "the model was pickled with, or re-export the model with the pinned version."
+    log "The running services were not stopped."
+    exit 1
+fi
+
 if [ ! -f ".env" ]; then
     log "Environment file (.env) not found."
     log "Please create one from the template:"
@@ -38,20 +42,43 @@ else
     log "Environment file found."
 fi
 
-log "Installing systemd service file..."
+if systemctl is-active --quiet $SERVICE_FILE; then
+    log "Service is running. Stopping it for update..."
+    sudo systemctl stop "$SERVICE_FILE"
+else
+    log "Service is not running."
+fi
+
+for consumer in $CONSUMERS; do
+    if systemctl is-active --quiet "sensor-system-consumer@$consumer.service"; then
+        log "Stopping $consumer consumer for update..."
+        sudo systemctl stop "sensor-system-consumer@$consumer.service"
+    fi
+done
+
+log "Installing systemd service files..."
 sudo cp "$SERVICE_FILE" /etc/systemd/system/
+sudo cp "$CONSUMER_SERVICE_FILE" /etc/systemd/system/
 
 log "Reloading systemd..."
 sudo systemctl daemon-reload
 
-log "Enabling and restarting service..."
+log "Enabling and restarting services..."
 sudo systemctl enable "$SERVICE_FILE"
 sudo systemctl restart "$SERVICE_FILE"
+for consumer in $CONSUMERS; do
+    sudo systemctl enable "sensor-system-consumer@$consumer.service"
+    sudo systemctl restart "sensor-system-consumer@$consumer.service"
+done
 
 log "Deployment complete! Showing service status:"
 echo "--------------------------------------------"
 sudo systemctl status "$SERVICE_FILE" --no-pager
+for consumer in $CONSUMERS; do
+    sudo systemctl status "sensor-system-consumer@$consumer.service" --no-pager
+done
 echo "--------------------------------------------"
 
 log "Service deployed and running."
-log "You can check the logs using: journalctl -u $SERVICE_FILE -f"
\ No newline at end of file
+log "You can check the logs using: journalctl -u $SERVICE_FILE -f"
+log "Consumer logs: journalctl -u 'sensor-system-consumer@*' -f"
\ No newline at end of file
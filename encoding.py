@@ -0,0 +1,137 @@
+import gzip
+import json
+import math
+from datetime import datetime, timezone
+from reading import Reading
+
+# Bump whenever the field order or quantisation below changes. The edge function
+# keeps a decoder for every version that may still be deployed on a device.
+SCHEMA_VERSION = 1
+
+# Schema v1: (field, decimal places). Values with a number of decimal places are
+# sent as integers scaled by 10**places; None means the value is sent unchanged.
+SCHEMA = [
+    ('device_id', None),
+    ('measured_at', None),          # Integer microseconds since the Unix epoch
+    ('uptime', 1),                  # 0.1 s
+    ('turbidity', 3),               # 0.001 NTU
+    ('temperature', 4),             # 0.0001 °C (DS18B20 resolution is 0.0625 °C)
+    ('total_dissolved_solids', 2),  # 0.01 ppm
+    ('ph', 3),                      # 0.001 pH
+    ('predicted_dissolved_oxygen', 3),  # 0.001 mg/L
+    ('turbidity_voltage', 5),       # 10 µV (ADS1115 LSB at gain 2/3 is 187.5 µV)
+    ('turbidity_rsd', 6),
+    ('turbidity_success_rate', 4),
+    ('turbidity_attempts', None),
+    ('total_dissolved_solids_voltage', 5),
+    ('total_dissolved_solids_rsd', 6),
+    ('total_dissolved_solids_success_rate', 4),
+    ('total_dissolved_solids_attempts', None),
+    ('ph_voltage', 5),
+    ('ph_rsd', 6),
+    ('ph_success_rate', 4),
+    ('ph_attempts', None),
+]
+
+FIELDS = tuple(name for name, _ in SCHEMA)
+
+if FIELDS != Reading.FIELDS:
+    raise ImportError("Reading.FIELDS no longer matches the wire schema. Bump SCHEMA_VERSION and update SCHEMA.")
+
+# Compact JSON, no whitespace between tokens
+_SEPARATORS = (',', ':')
+
+def _quantise(value, places):
+    """Scale a float to an integer, mapping missing and non-finite values to None."""
+    if value is None:
+        return None
+    value = float(value)
+    if not math.isfinite(value):
+        return None
+    if places is None:
+        return value
+    return int(round(value * 10 ** places))
+
+def _dequantise(value, places):
+    if value is None or places is None:
+        return value
+    return value / 10 ** places
+
+def _timestamp_to_micros(measured_at):
+    dt = datetime.fromisoformat(measured_at)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    delta = dt - datetime(1970, 1, 1, tzinfo=timezone.utc)
+    return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+def _micros_to_timestamp(micros):
+    seconds, micros = divmod(micros, 1_000_000)
+    dt = datetime.fromtimestamp(seconds, tz=timezone.utc).replace(microsecond=micros)
+    return dt.isoformat()
+
+def _to_row(reading):
+    row = []
+    for (name, places), value in zip(SCHEMA, reading.to_row()):
+        if name == 'device_id':
+            row.append(int(value) if value is not None else None)
+        elif name == 'measured_at':
+            row.append(_timestamp_to_micros(value))
+        elif name.endswith('_attempts'):
+            row.append(int(value) if value is not None else None)
+        else:
+            row.append(_quantise(value, places))
+    return row
+
+def _from_row(row):
+    values = []
+    for (name, places), value in zip(SCHEMA, row):
+        if name == 'measured_at':
+            values.append(_micros_to_timestamp(value))
+        else:
+            values.append(_dequantise(value, places))
+    return Reading.from_row(values)
+
+def encode_sample(reading):
+    """
+    Encode a single sample as a positional JSON array prefixed with the schema version.
+    :param reading: Reading to encode
+    :return: UTF-8 encoded bytes, e.g. b'[1,1,1758207226000000,...]'
+    """
+    return json.dumps([SCHEMA_VERSION, *_to_row(reading)], separators=_SEPARATORS).encode()
+
+def encode_batch(readings, compress=True):
+    """
+    Encode several samples into one gzip-compressed payload.
+    :param readings: Iterable of Readings
+    :param compress: Gzip the payload (send with `Content-Encoding: gzip`)
+    :return: Bytes of {"v": SCHEMA_VERSION, "b": [[...], ...]}
+    """
+    payload = json.dumps(
+        {'v': SCHEMA_VERSION, 'b': [_to_row(reading) for reading in readings]},
+        separators=_SEPARATORS
+    ).encode()
+    return gzip.compress(payload, mtime=0) if compress else payload
+
+def decode(body):
+    """
+    Decode a payload produced by `encode_sample` or `encode_batch`, or a legacy
+    JSON sample object. Mirrors the decoder in the `insert-sample` edge function.
+    :param body: Request body bytes (gzip is detected from the magic number)
+    :return: List of Readings
+    """
+    if body[:2] == b'\x1f\x8b':
+        body = gzip.decompress(body)
+    data = json.loads(body)
+
+    if isinstance(data, list):
+        version, *row = data
+        _check_version(version)
+        return [_from_row(row)]
+    if 'b' in data:
+        _check_version(data.get('v'))
+        return [_from_row(row) for row in data['b']]
+    return [Reading.from_dict(data)]
+
+def _check_version(version):
+    if version != SCHEMA_VERSION:
+        raise ValueError(f"Unsupported sample schema version: {version}")
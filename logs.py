@@ -0,0 +1,150 @@
+import atexit
+import logging
+import os
+import queue
+import resource
+import sys
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from time import monotonic
+from dotenv import load_dotenv
+
+load_dotenv()
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+
+# Repeats of the same warning (per logger, template and identity fields) allowed per window
+# before further repeats are suppressed and counted. Other levels are never suppressed.
+# The window spans four 15 minute sampling ticks: a flaky probe warns on every tick, so a
+# window shorter than a tick would let every tick's retries through
+RATE_LIMIT_WINDOW = 3600  # seconds
+RATE_LIMIT_BURST = 1
+
+# Fields that identify *what* a message is about, so e.g. warnings for different channels
+# are rate-limited separately while the same warning with a new rsd value is not
+IDENTITY_FIELDS = ('channel', 'probe', 'consumer', 'function')
+
+def _format_value(value):
+    if isinstance(value, float):
+        return f"{value:.6g}"
+    text = str(value)
+    if text == '' or any(c in text for c in ' ="\n'):
+        return '"' + text.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+    return text
+
+class LogfmtFormatter(logging.Formatter):
+    """Format records as logfmt: level=warning logger=sensors msg="High RSD" channel=1 rsd=0.0123"""
+    def format(self, record):
+        parts = [
+            f"level={record.levelname.lower()}",
+            f"logger={record.name}",
+            f"msg={_format_value(record.getMessage())}",
+        ]
+        for key, value in getattr(record, 'fields', {}).items():
+            parts.append(f"{key}={_format_value(value)}")
+        return ' '.join(parts)
+
+class _QueueHandler(QueueHandler):
+    """Hand records to the writer thread with the traceback as an `exc` field rather than in msg."""
+    def prepare(self, record):
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg, record.args = record.getMessage(), None
+        if record.exc_info:
+            exc = logging.Formatter().formatException(record.exc_info)
+            record.fields = {**getattr(record, 'fields', {}), 'exc': exc}
+            record.exc_info, record.exc_text = None, None
+        return record
+
+class RateLimitFilter(logging.Filter):
+    """
+    Let the first RATE_LIMIT_BURST repeats of a warning through per window and drop the rest.
+    The first message after a window with suppressed repeats carries a `suppressed` count.
+    """
+    def __init__(self, window=RATE_LIMIT_WINDOW, burst=RATE_LIMIT_BURST):
+        super().__init__()
+        self.window = window
+        self.burst = burst
+        self.lock = threading.Lock()
+        self.state = {}  # key -> [window start, count, suppressed]
+
+    def filter(self, record):
+        if record.levelno != logging.WARNING:
+            return True
+
+        fields = getattr(record, 'fields', {})
+        key = (record.name, record.msg) + tuple(fields.get(f) for f in IDENTITY_FIELDS)
+        now = monotonic()
+
+        with self.lock:
+            start, count, suppressed = self.state.get(key, (now, 0, 0))
+            if now - start >= self.window:
+                start, count = now, 0
+            count += 1
+            if count > self.burst:
+                self.state[key] = (start, count, suppressed + 1)
+                return False
+            self.state[key] = (start, count, 0)
+
+        if suppressed:
+            record.fields = {**fields, 'suppressed': suppressed}
+        return True
+
+class StructuredLogger:
+    """Logger taking machine-parseable fields as keyword arguments: log.warning("High RSD", channel=1, rsd=0.02)"""
+    def __init__(self, logger):
+        self.logger = logger
+
+    def _log(self, level, msg, exc_info, fields):
+        if self.logger.isEnabledFor(level):
+            self.logger.log(level, msg, exc_info=exc_info, extra={'fields': fields})
+
+    def debug(self, msg, **fields):
+        self._log(logging.DEBUG, msg, None, fields)
+
+    def info(self, msg, **fields):
+        self._log(logging.INFO, msg, None, fields)
+
+    def warning(self, msg, **fields):
+        self._log(logging.WARNING, msg, None, fields)
+
+    def error(self, msg, exc_info=None, **fields):
+        self._log(logging.ERROR, msg, exc_info, fields)
+
+_listener = None
+
+def _configure():
+    """Route all loggers through a non-blocking queue to a single writer thread on stdout."""
+    global _listener
+    log_queue = queue.SimpleQueue()
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(LogfmtFormatter())
+
+    queue_handler = _QueueHandler(log_queue)
+    queue_handler.addFilter(RateLimitFilter())
+
+    root = logging.getLogger()
+    root.handlers = [queue_handler]
+    root.setLevel(LOG_LEVEL)
+
+    _listener = QueueListener(log_queue, stream_handler)
+    _listener.start()
+    atexit.register(_listener.stop)  # Flush queued records on exit
+
+def process_usage():
+    """
+    Return this process's CPU seconds and context switches so far (all threads).
+    Each context switch is the process blocking or being preempted, so the count over a
+    tick approximates how often the process woke the CPU.
+    """
+    rusage = resource.getrusage(resource.RUSAGE_SELF)
+    return rusage.ru_utime + rusage.ru_stime, rusage.ru_nvcsw + rusage.ru_nivcsw
+
+def get_logger(name):
+    """
+    Get a structured logger, configuring logging on first use.
+    :param name: Logger name, usually the module name
+    """
+    if _listener is None:
+        _configure()
+    return StructuredLogger(logging.getLogger(name))
@@ -1,26 +1,31 @@
 import os
 from datetime import datetime
 import numpy as np
-import pandas as pd
 import joblib
 from dotenv import load_dotenv
-from supabase import create_client
 
 # Load environment variables
 load_dotenv()
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-DEVICE_ID = int(os.getenv("DEVICE_ID")) 
 
-# Create Supabase client
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "GradientBoosting_withTDS_model.joblib")
+
+def load_model():
+    """
+    Load the Gradient Boosting DO model. Load once and pass it to the predict functions
+    when predicting repeatedly; loading takes far longer than a prediction.
+    """
+    if not os.path.exists(MODEL_PATH):
+        raise FileNotFoundError(f"Model not found at path: {MODEL_PATH}")
+    return joblib.load(MODEL_PATH)
 
 def preprocess_sensor_data(sample):
     """
     Convert Supabase sample row into model-ready NumPy array.
     Expects: [DateOrdinal, Temperature, pH, Turbidity, TDS]
     """
-    date_ordinal = pd.Timestamp(sample["measured_at"]).toordinal()
+    date_ordinal = datetime.fromisoformat(sample["measured_at"]).toordinal()
     temperature = sample["temperature"]
     ph = sample["ph"]
     turbidity = sample["turbidity"]
@@ -33,17 +38,22 @@ def predict_do() -> float:
     """
     Fetch latest sensor data from Supabase and predict DO using Gradient Boosting model.
     """
+    from supabase import create_client
+
+    device_id = int(os.getenv("DEVICE_ID"))
+    supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+
     # Query latest sample
     response = supabase.table("samples")\
         .select("*")\
-        .eq("device_id", DEVICE_ID)\
+        .eq("device_id", device_id)\
         .order("measured_at", desc=True)\
         .limit(1)\
         .execute()
 
     samples = response.data
     if not samples:
-        raise ValueError(f"No samples found for device_id = {DEVICE_ID}")
+        raise ValueError(f"No samples found for device_id = {device_id}")
 
     sample = samples[0]
 
@@ -51,36 +61,35 @@ def predict_do() -> float:
     X = preprocess_sensor_data(sample)
 
     # Load model
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    model_path = os.path.join(script_dir, "GradientBoosting_withTDS_model.joblib")
-    if not os.path.exists(model_path):
-        raise FileNotFoundError(f"Model not found at path: {model_path}")
-    
-    model = joblib.load(model_path)
+    model = load_model()
 
     # Predict DO
     predicted_do = model.predict(X)[0]
     return float(predicted_do)
 
-def predict_do_from_sample(sample: dict) -> float:
+def predict_do_from_sample(sample: dict, model=None) -> float:
     """
     Given a sample dict with the correct fields, predict DO using the trained model.
+    The model is loaded from disk if not given.
     """
     # Preprocess the input
     X = preprocess_sensor_data(sample)
 
     # Load the model
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    model_path = os.path.join(script_dir, "GradientBoosting_withTDS_model.joblib")
-    if not os.path.exists(model_path):
-        raise FileNotFoundError(f"Model not found at path: {model_path}")
-
-    model = joblib.load(model_path)
+    if model is None:
+        model = load_model()
 
     # Predict DO
     predicted_do = model.predict(X)[0]
     return float(predicted_do)
 
+def predict_do_from_reading(reading, model) -> float:
+    """
+    Predict DO for a Reading using a preloaded model.
+    """
+    predicted_do = model.predict(reading.features())[0]
+    return float(predicted_do)
+
 
 if __name__ == "__main__":
     try:
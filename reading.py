@@ -0,0 +1,64 @@
+import numpy as np
+from datetime import datetime
+
+class Reading:
+    """
+    A single sample with a fixed schema, shared by acquisition, the sample stream,
+    the CSV log, the upload encoding and DO prediction.
+    Field order is the CSV column order and the positional order used on the wire.
+    """
+    FIELDS = (
+        'device_id', 'measured_at', 'uptime', 'turbidity', 'temperature', 'total_dissolved_solids', 'ph', 'predicted_dissolved_oxygen',
+        'turbidity_voltage', 'turbidity_rsd', 'turbidity_success_rate', 'turbidity_attempts',
+        'total_dissolved_solids_voltage', 'total_dissolved_solids_rsd', 'total_dissolved_solids_success_rate', 'total_dissolved_solids_attempts',
+        'ph_voltage', 'ph_rsd', 'ph_success_rate', 'ph_attempts'
+    )
+    __slots__ = FIELDS
+
+    def __init__(self, **values):
+        for name in self.FIELDS:
+            setattr(self, name, values.pop(name, None))
+        if values:
+            raise TypeError(f"Unknown Reading fields: {', '.join(values)}")
+
+    @classmethod
+    def from_row(cls, row):
+        """Build a Reading from values in FIELDS order."""
+        reading = cls.__new__(cls)
+        for name, value in zip(cls.FIELDS, row):
+            setattr(reading, name, value)
+        return reading
+
+    @classmethod
+    def from_dict(cls, sample):
+        """Build a Reading from a sample dict, ignoring keys outside the schema."""
+        return cls.from_row([sample.get(name) for name in cls.FIELDS])
+
+    def set_diagnostics(self, sensor, adc_data):
+        """
+        Copy ADC diagnostics into the sensor's diagnostic fields.
+        :param sensor: 'turbidity', 'total_dissolved_solids' or 'ph'
+        :param adc_data: Diagnostic dict from Sensors.read_adc_scan
+        """
+        setattr(self, f'{sensor}_voltage', adc_data['voltage'])
+        setattr(self, f'{sensor}_rsd', adc_data['rsd'])
+        setattr(self, f'{sensor}_success_rate', adc_data['success_rate'])
+        setattr(self, f'{sensor}_attempts', adc_data['attempts'])
+
+    def to_row(self):
+        """Values in FIELDS order, e.g. for csv.writer or the sample stream."""
+        return [getattr(self, name) for name in self.FIELDS]
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.FIELDS}
+
+    def features(self):
+        """
+        Model-ready feature vector for DO prediction.
+        :return: NumPy array of shape (1, 5): [DateOrdinal, Temperature, pH, Turbidity, TDS]
+        """
+        date_ordinal = datetime.fromisoformat(self.measured_at).toordinal()
+        return np.array([[date_ordinal, self.temperature, self.ph, self.turbidity, self.total_dissolved_solids]], dtype=float)
+
+    def __repr__(self):
+        return f"Reading(device_id={self.device_id!r}, measured_at={self.measured_at!r})"
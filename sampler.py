@@ -1,121 +1,83 @@
-import requests
 from datetime import datetime, timezone
 from time import monotonic, sleep
 from dotenv import load_dotenv
 import os
-import csv
 from sensors import Sensors
-# from predict_DO.predict_DisOx import predict_do_from_sample
+from stream import SamplePublisher
+from logs import get_logger, process_usage
 
 
 
 load_dotenv()
 
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_ANON_KEY = os.getenv("SUPABASE_ANON_KEY")
+log = get_logger('sampler')
+
 DEVICE_ID = os.getenv("DEVICE_ID")
 
 SAMPLING_INTERVAL = 15  # minutes
 
+# DS18B20 resolution in bits. 11 bits (0.125 °C steps, 375 ms conversion) is already finer than
+# the probe's ±0.5 °C accuracy; 12 bits doubles the conversion time for no real precision
+TEMPERATURE_RESOLUTION = int(os.getenv("TEMPERATURE_RESOLUTION", 11))
+
+# Consumer processes expected to subscribe to the sample stream (see consumer.py)
+EXPECTED_SUBSCRIBERS = int(os.getenv("SAMPLE_SUBSCRIBERS", 3))
+SUBSCRIBER_GRACE_PERIOD = 30  # seconds
+
 start_time = None
 next_sample_time = None
+last_context_switches = None
 
 sensors = None
-
-"""
-def predict_dissolved_oxygen(turbidity, temperature, total_dissolved_solids, ph, measured_at):
-    try:
-        sample = {
-            "measured_at": measured_at,
-            "temperature": temperature,
-            "ph": ph,
-            "turbidity": turbidity,
-            "total_dissolved_solids": total_dissolved_solids
-        }
-        return predict_do_from_sample(sample)
-    except Exception as e:
-        print(f"[WARNING] DO prediction failed: {e}")
-        return None
-"""
-
-def log_sample(sample):
-    path = "data/samples.csv"
-    fieldnames = [
-        'device_id', 'measured_at', 'uptime', 'turbidity', 'temperature', 'total_dissolved_solids', 'ph', 'predicted_dissolved_oxygen',
-        'turbidity_voltage', 'turbidity_rsd', 'turbidity_success_rate', 'turbidity_attempts',
-        'total_dissolved_solids_voltage', 'total_dissolved_solids_rsd', 'total_dissolved_solids_success_rate', 'total_dissolved_solids_attempts',
-        'ph_voltage', 'ph_rsd', 'ph_success_rate', 'ph_attempts'
-    ]
-    file_exists = os.path.isfile(path)
-
-    with open(path, mode='a', newline='') as file:
-        writer = csv.DictWriter(file, fieldnames=fieldnames)
-
-        if not file_exists:
-            writer.writeheader()
-
-        writer.writerow(sample)
-
-def send_sample(sample, max_retries=5, base_backoff=2):
-    url = f"{SUPABASE_URL}/functions/v1/insert-sample"
-
-    headers = {
-        "Authorization": f"Bearer {SUPABASE_ANON_KEY}",
-        "Content-Type": "application/json"
-    }
-
-    for attempt in range(max_retries):
-        try:
-            response = requests.post(url, json=sample, headers=headers, timeout=10)
-            response.raise_for_status()
-            print(f"Sample measured at {sample['measured_at']} sent successfully.")
-            return
-        except Exception as e:
-            print(f"Send failed: {e}")
-            if attempt == max_retries - 1:
-                print("Max retries reached. Giving up.")
-                return
-            backoff_time = base_backoff * (2 ** attempt)
-            print(f"Retrying in {backoff_time} seconds... (Attempt {attempt + 1}/{max_retries})")
-            sleep(backoff_time)
+publisher = None
 
 def setup():
-    global start_time, next_sample_time, sensors
+    global start_time, next_sample_time, sensors, publisher
     start_time = monotonic()
     next_sample_time = monotonic()
-    sensors = Sensors()
-    print("Sampler started.")
+    sensors = Sensors(temperature_resolution=TEMPERATURE_RESOLUTION)
+    publisher = SamplePublisher()
+    subscribers = publisher.wait_for_subscribers(EXPECTED_SUBSCRIBERS, SUBSCRIBER_GRACE_PERIOD)
+    log.info("Sampler started", subscribers=subscribers, expected_subscribers=EXPECTED_SUBSCRIBERS)
 
 def loop():
-    global next_sample_time
+    global next_sample_time, last_context_switches
+
+    # Cost of this tick, and wakeups while idle since the previous one
+    tick_start = monotonic()
+    cpu_start, switches_start = process_usage()
+    idle_wakeups = switches_start - last_context_switches if last_context_switches is not None else None
 
     # measured_at represents when sensor readings began
     # (actual sensor readings may take a few seconds)
     measured_at = datetime.now(timezone.utc).isoformat()
     uptime = monotonic() - start_time
 
-    sensor_data = sensors.read_all()
-
-    """
-    predicted_dissolved_oxygen = predict_dissolved_oxygen(
-        sensor_data['turbidity'], sensor_data['temperature'],
-        sensor_data['total_dissolved_solids'], sensor_data['ph'], measured_at
-    )
-    """
-
-    sample = {
-        "device_id": DEVICE_ID,
-        "measured_at": measured_at,
-        "uptime": uptime,
-        "predicted_dissolved_oxygen": None,  # predicted_dissolved_oxygen,
-        **sensor_data
-    }
+    reading = sensors.read_all()
+
+    reading.device_id = DEVICE_ID
+    reading.measured_at = measured_at
+    reading.uptime = uptime
+    # predicted_dissolved_oxygen is filled in off the critical path by the uploader (see consumer.py)
 
-    # Log the sample to a CSV file
-    log_sample(sample)
+    # Hand the sample to the consumers (CSV logger, uploader, ...) running as separate processes
+    subscribers = publisher.publish(reading)
 
-    # Send the sample to Supabase with retries
-    send_sample(sample)
+    cpu_end, last_context_switches = process_usage()
+    tick_cost = {
+        'active_s': monotonic() - tick_start,
+        'cpu_s': cpu_end - cpu_start,
+        'wakeups': last_context_switches - switches_start,
+        'idle_wakeups': idle_wakeups,
+    }
+    if subscribers == 0:
+        log.warning("No consumers subscribed, sample not delivered", measured_at=measured_at, **tick_cost)
+    else:
+        log.info(
+            "Sample published", measured_at=measured_at, subscribers=subscribers,
+            turbidity=reading.turbidity, temperature=reading.temperature,
+            total_dissolved_solids=reading.total_dissolved_solids, ph=reading.ph, **tick_cost
+        )
 
     # Wait until the next precise interval
     next_sample_time += SAMPLING_INTERVAL * 60  # Convert minutes to seconds
@@ -128,11 +90,13 @@ def main():
         while True:
             loop()
     except KeyboardInterrupt:
-        print("Sampler interrupted by user.")
+        log.info("Sampler interrupted by user")
     except Exception as e:
-        print(f"Uncaught exception in sampler: {e}")
+        log.error("Uncaught exception in sampler", exc_info=e)
     finally:
-        print("Sampler stopped.")
+        if publisher:
+            publisher.close()
+        log.info("Sampler stopped")
 
 if __name__ == "__main__":
     main()
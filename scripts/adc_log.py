@@ -6,6 +6,7 @@ from datetime import datetime
 
 import board, busio
 import adafruit_ads1x15.ads1115 as ADS
+from adafruit_ads1x15.ads1x15 import Mode
 from adafruit_ads1x15.analog_in import AnalogIn
 
 def ask(prompt, cast=int, default=None, valid=lambda x: True):
@@ -19,12 +20,52 @@ def ask(prompt, cast=int, default=None, valid=lambda x: True):
         pass
     return default
 
+def make_pacer(period):
+    """
+    Return a wait() that blocks until the next tick of a fixed-period schedule without spinning.
+    Uses a kernel timerfd where available (Python 3.13+), otherwise sleeps until an absolute
+    deadline so timing errors never accumulate.
+    """
+    if hasattr(os, "timerfd_create"):
+        fd = os.timerfd_create(time.CLOCK_MONOTONIC)
+        os.timerfd_settime(fd, initial=period, interval=period)
+
+        def wait():
+            # Blocks in the kernel; returns the number of ticks elapsed since the last read
+            return int.from_bytes(os.read(fd, 8), "little")
+
+        wait.close = lambda: os.close(fd)
+        return wait
+
+    next_tick = time.monotonic()
+
+    def wait():
+        nonlocal next_tick
+        next_tick += period
+        delay = next_tick - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+            return 1
+        # Fell behind: skip the missed ticks rather than bursting to catch up
+        missed = int(-delay // period) + 1
+        next_tick += (missed - 1) * period
+        return missed
+
+    wait.close = lambda: None
+    return wait
+
 # --- Hardware setup ---
 i2c = busio.I2C(board.SCL, board.SDA)
 ads = ADS.ADS1115(i2c)
 ads.gain = 2/3          # ±6.144 V FSR (inputs must stay within 0..VDD)
-ads.data_rate = 128     # target 128 SPS
-PERIOD = 1.0 / ads.data_rate
+ads.data_rate = 128     # Conversion rate, which sets the ADC's noise filtering
+# Single-shot: every read triggers its own conversion and waits for it, so each logged sample
+# is a distinct conversion. (In continuous mode a timer-driven read returns whatever conversion
+# was last latched, and the ADC clock drifts up to ±10%, so samples repeat or get skipped.)
+ads.mode = Mode.SINGLE
+# A conversion takes up to 1 / (0.9 * 128) = 8.7 ms plus I2C time, so trigger every 10 ms
+SAMPLE_RATE = 100
+PERIOD = 1.0 / SAMPLE_RATE
 
 # --- CSV setup ---
 csv_name = input("Enter CSV file name (e.g. results.csv): ").strip()
@@ -37,7 +78,7 @@ csv_path = os.path.join(out_dir, csv_name)
 new_file = not os.path.exists(csv_path)
 
 print(f"\nLogging to: {csv_path}")
-print(f"gain={ads.gain:.2f}, data_rate={ads.data_rate}\n")
+print(f"gain={ads.gain:.2f}, data_rate={ads.data_rate}, sample_rate={SAMPLE_RATE}\n")
 
 with open(csv_path, "a", newline="") as f:
     writer = csv.writer(f)
@@ -58,25 +99,33 @@ with open(csv_path, "a", newline="") as f:
 
             A = AnalogIn(ads, getattr(ADS, ch))
 
-            # Collect n samples paced at 128 SPS
+            # Collect n conversions, sleeping until each deadline before triggering the next
             samples = np.empty(n, dtype=float)
-            next_tick = time.perf_counter()
+            times = np.empty(n, dtype=float)
+            missed = 0
+            wait = make_pacer(PERIOD)
+            cpu_start = time.process_time()
             for i in range(n):
-                while True:
-                    now = time.perf_counter()
-                    dt = next_tick - now
-                    if dt <= 0:
-                        break
-                    if dt > 0.002:
-                        time.sleep(dt - 0.001)
-                    # else spin
+                missed += wait() - 1
+                times[i] = time.perf_counter()
                 samples[i] = A.voltage
-                next_tick += PERIOD
+            cpu_time = time.process_time() - cpu_start
+            wait.close()
 
             mean_v = np.mean(samples)
             stdev_v = np.std(samples, ddof=1)
 
+            # Pacing report
+            wall_time = times[-1] - times[0]
+            intervals = np.diff(times)
+            rate = (n - 1) / wall_time if n > 1 else float("nan")
+            jitter = np.std(intervals) * 1e3 if n > 2 else float("nan")
+            worst = np.max(np.abs(intervals - PERIOD)) * 1e3 if n > 1 else float("nan")
+
             print(f"→ {reference} on {ch}: mean = {mean_v:.6f} V (N={n}), stdev = {stdev_v:.6f} V")
+            print(f"  rate = {rate:.2f} SPS (target {SAMPLE_RATE}), jitter = {jitter:.3f} ms, "
+                  f"worst = {worst:.3f} ms, missed ticks = {missed}, "
+                  f"CPU = {cpu_time:.3f} s ({cpu_time / wall_time * 100 if wall_time > 0 else 0:.1f}%)")
 
             writer.writerow([
                 datetime.now().isoformat(), ads.gain, ads.data_rate,
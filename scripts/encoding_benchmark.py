@@ -0,0 +1,97 @@
+import os
+import sys
+import csv
+import gzip
+import json
+import random
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from encoding import encode_sample, encode_batch, decode
+from reading import Reading
+from synthetic import synthetic_reading
+
+SAMPLES_PATH = "data/samples.csv"
+
+def ask(prompt, cast=int, default=None, valid=lambda x: True):
+    """Generic input prompt with default fallback and validation."""
+    raw = input(prompt)
+    try:
+        value = cast(raw)
+        if valid(value):
+            return value
+    except ValueError:
+        pass
+    return default
+
+def load_samples(path):
+    """Load logged samples, converting numeric CSV fields back to numbers."""
+    samples = []
+    with open(path, newline='') as f:
+        for row in csv.DictReader(f):
+            sample = {}
+            for name in Reading.FIELDS:
+                value = row.get(name)
+                if name == 'measured_at':
+                    sample[name] = value
+                elif value in (None, ''):
+                    sample[name] = None
+                else:
+                    sample[name] = float(value)
+            samples.append(Reading.from_dict(sample))
+    return samples
+
+def synthetic_samples(n):
+    """Generate samples shaped like real sampler output."""
+    start = datetime.now(timezone.utc)
+    return [
+        synthetic_reading('1', (start + timedelta(minutes=15 * i, microseconds=random.randint(0, 999999))).isoformat(), 900.0 * i)
+        for i in range(n)
+    ]
+
+def main():
+    if os.path.isfile(SAMPLES_PATH):
+        samples = load_samples(SAMPLES_PATH)
+        print(f"Loaded {len(samples)} samples from {SAMPLES_PATH}")
+    else:
+        samples = []
+    if not samples:
+        n = ask("No logged samples found. Number of synthetic samples (default 96): ", int, 96, lambda x: x > 0)
+        samples = synthetic_samples(n)
+
+    batch_size = ask("Batch size (default 96, one day at 15 minute intervals): ", int, 96, lambda x: x > 0)
+
+    # Baseline is what `requests.post(json=...)` sends
+    json_sizes = [len(json.dumps(s.to_dict()).encode()) for s in samples]
+    compact_sizes = [len(encode_sample(s)) for s in samples]
+
+    batches = [samples[i:i + batch_size] for i in range(0, len(samples), batch_size)]
+    json_batch_bytes = sum(len(gzip.compress(json.dumps([s.to_dict() for s in b]).encode())) for b in batches)
+    compact_batch_bytes = sum(len(encode_batch(b)) for b in batches)
+
+    # Round trip to make sure nothing is lost beyond the schema quantisation
+    for s in samples:
+        decoded = decode(encode_sample(s))[0]
+        assert decoded.measured_at == datetime.fromisoformat(s.measured_at).isoformat()
+
+    n = len(samples)
+    json_total = sum(json_sizes)
+    compact_total = sum(compact_sizes)
+
+    print("-" * 72)
+    print(f"{'Encoding':<32}{'Total bytes':>14}{'Bytes/sample':>14}{'vs JSON':>12}")
+    print("-" * 72)
+    for name, total in [
+        ("JSON object (current)", json_total),
+        ("Compact array", compact_total),
+        (f"JSON objects, gzip x{batch_size}", json_batch_bytes),
+        (f"Compact batch, gzip x{batch_size}", compact_batch_bytes),
+    ]:
+        print(f"{name:<32}{total:>14}{total / n:>14.1f}{total / json_total:>11.1%}")
+    print("-" * 72)
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\nInterrupted.")
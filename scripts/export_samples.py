@@ -0,0 +1,239 @@
+import os
+import sys
+import json
+import glob
+import argparse
+import threading
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+import pyarrow as pa
+import pyarrow.parquet as pq
+from dotenv import load_dotenv
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from reading import Reading
+
+# Export the `samples` table to local Parquet files, one directory per device:
+#   <out>/device-<id>/part-00000.parquet, part-00001.parquet, ...
+# Each device is paged by its (device_id, measured_at) key, so memory stays bounded by one
+# row group per worker. Progress is checkpointed after every completed part file; rerunning
+# the same command resumes where the last run stopped.
+#
+# Samples can reach the table long after they were measured (uploads queued through an outage),
+# so a rerun does not just continue after the last exported measured_at. It re-scans a lookback
+# window before it and keeps only rows with an id above the highest id already exported. Rows
+# that arrive later than the lookback window are missed; keep the window longer than the
+# longest upload backlog a device can hold.
+
+TIMESTAMP_COLUMNS = {'created_at', 'measured_at'}
+INTEGER_COLUMNS = {'id', 'device_id', 'turbidity_attempts', 'total_dissolved_solids_attempts', 'ph_attempts'}
+
+COLUMNS = ('id', 'created_at') + Reading.FIELDS
+SCHEMA = pa.schema([
+    (name, pa.timestamp('us') if name in TIMESTAMP_COLUMNS else pa.int64() if name in INTEGER_COLUMNS else pa.float64())
+    for name in COLUMNS
+])
+
+class Checkpoint:
+    """Per-device export progress: the last exported measured_at and the number of completed parts."""
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.state = {}
+        if os.path.isfile(path):
+            with open(path, 'r') as f:
+                self.state = json.load(f)
+
+    def get(self, device_id):
+        """
+        :return: Dict of `cursor` (latest exported measured_at), `max_id` (highest exported id),
+            `parts`, `rows`, and `scan` (the position of an unfinished run, or None)
+        """
+        progress = {'cursor': None, 'max_id': None, 'parts': 0, 'rows': 0, 'scan': None}
+        progress.update(self.state.get(str(device_id), {}))
+        return progress
+
+    def update(self, device_id, **progress):
+        with self.lock:
+            self.state[str(device_id)] = progress
+            # Write atomically so a crash never leaves a truncated checkpoint
+            with open(self.path + '.tmp', 'w') as f:
+                json.dump(self.state, f, indent=4)
+            os.replace(self.path + '.tmp', self.path)
+
+def to_columns(rows):
+    """Convert a page of PostgREST rows to a column dict matching SCHEMA."""
+    columns = {name: [] for name in COLUMNS}
+    for row in rows:
+        for name in COLUMNS:
+            value = row.get(name)
+            if name in TIMESTAMP_COLUMNS and value is not None:
+                value = datetime.fromisoformat(value)
+            columns[name].append(value)
+    return columns
+
+def fetch_page(session, url, device_id, cursor, page_size, min_id=None):
+    params = {
+        'select': ','.join(COLUMNS),
+        'device_id': f'eq.{device_id}',
+        'order': 'measured_at.asc',
+        'limit': page_size,
+    }
+    if cursor is not None:
+        params['measured_at'] = f'gt.{cursor}'
+    if min_id is not None:
+        params['id'] = f'gt.{min_id}'
+    response = session.get(f"{url}/rest/v1/samples", params=params, timeout=30)
+    response.raise_for_status()
+    return response.json()
+
+def make_session(key):
+    session = requests.Session()
+    session.headers.update({"apikey": key, "Authorization": f"Bearer {key}"})
+    return session
+
+def start_scan(progress, lookback):
+    """
+    Decide where a new run scans from: everything on the first run, otherwise `lookback` before
+    the last exported measured_at, restricted to ids above the highest exported id.
+    Checkpoints written before ids were tracked continue after the cursor, as they used to.
+    """
+    after, min_id = progress['cursor'], progress['max_id']
+    if after is not None and min_id is not None:
+        after = (datetime.fromisoformat(after) - lookback).isoformat()
+    return {'after': after, 'min_id': min_id, 'cursor': progress['cursor'], 'max_id': progress['max_id']}
+
+def export_device(key, url, device_id, out_dir, checkpoint, page_size, rows_per_part, row_group_size, lookback):
+    """
+    Export one device's samples that are not yet in its part files.
+    :param lookback: How far before the last exported measured_at to look for late arrivals (timedelta)
+    :return: Number of rows exported in this run
+    """
+    session = make_session(key)  # Sessions are not shared between threads
+    device_dir = os.path.join(out_dir, f'device-{device_id}')
+    os.makedirs(device_dir, exist_ok=True)
+
+    # Parts still being written when a previous run stopped are incomplete; redo them
+    for partial in glob.glob(os.path.join(device_dir, '*.tmp')):
+        os.remove(partial)
+
+    progress = checkpoint.get(device_id)
+    parts, total = progress['parts'], progress['rows']
+    # An interrupted run resumes its own scan: the id filter must stay fixed until it finishes
+    scan = progress['scan'] or start_scan(progress, lookback)
+    exported = 0
+
+    writer, part_path, part_rows = None, None, 0
+    buffer = []
+
+    def flush_buffer():
+        nonlocal buffer
+        if buffer:
+            writer.write_table(pa.table(to_columns(buffer), schema=SCHEMA))
+            buffer = []
+
+    def close_part():
+        nonlocal writer, parts, total, part_rows
+        flush_buffer()
+        writer.close()
+        os.replace(part_path, part_path[:-len('.tmp')])
+        parts += 1
+        total += part_rows
+        part_rows = 0
+        writer = None
+        checkpoint.update(
+            device_id, cursor=progress['cursor'], max_id=progress['max_id'], parts=parts, rows=total, scan=scan
+        )
+
+    while True:
+        rows = fetch_page(session, url, device_id, scan['after'], page_size, scan['min_id'])
+        if not rows:
+            break
+
+        if writer is None:
+            part_path = os.path.join(device_dir, f'part-{parts:05d}.parquet.tmp')
+            writer = pq.ParquetWriter(part_path, SCHEMA, compression='zstd')
+
+        buffer.extend(rows)
+        part_rows += len(rows)
+        exported += len(rows)
+        scan = {
+            **scan,
+            'after': rows[-1]['measured_at'],
+            'cursor': max(scan['cursor'] or '', rows[-1]['measured_at']),
+            'max_id': max(scan['max_id'] or 0, max(row['id'] for row in rows)),
+        }
+
+        if len(buffer) >= row_group_size:
+            flush_buffer()
+        if part_rows >= rows_per_part:
+            close_part()
+        if len(rows) < page_size:
+            break
+
+    if writer is not None:
+        close_part()
+    # The scan is complete: only now is it safe to raise the id watermark
+    checkpoint.update(device_id, cursor=scan['cursor'], max_id=scan['max_id'], parts=parts, rows=total, scan=None)
+    return exported
+
+def list_devices(session, url):
+    response = session.get(f"{url}/rest/v1/devices", params={'select': 'id', 'order': 'id.asc'}, timeout=30)
+    response.raise_for_status()
+    return [device['id'] for device in response.json()]
+
+def main():
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Export historical samples from Supabase to local Parquet files.")
+    parser.add_argument('--url', default=os.getenv("SUPABASE_URL"), help="Supabase URL (default: SUPABASE_URL)")
+    parser.add_argument('--out', default="data/export", help="Output directory (default: data/export)")
+    parser.add_argument('--devices', type=int, nargs='*', help="Device IDs to export (default: all devices)")
+    parser.add_argument('--workers', type=int, default=4, help="Devices fetched concurrently (default: 4)")
+    parser.add_argument('--page-size', type=int, default=1000, help="Rows per request (default: 1000)")
+    parser.add_argument('--row-group-size', type=int, default=10000, help="Rows per Parquet row group (default: 10000)")
+    parser.add_argument('--rows-per-part', type=int, default=100000, help="Rows per Parquet file (default: 100000)")
+    parser.add_argument('--lookback-days', type=float, default=14, help="Days before the last export to re-scan for late-arriving samples (default: 14)")
+    args = parser.parse_args()
+
+    if not args.url:
+        print("Error: No Supabase URL. Set SUPABASE_URL or pass --url.")
+        sys.exit(1)
+
+    key = os.getenv("SUPABASE_ANON_KEY", "")
+    os.makedirs(args.out, exist_ok=True)
+    checkpoint = Checkpoint(os.path.join(args.out, '_checkpoint.json'))
+
+    devices = args.devices or list_devices(make_session(key), args.url)
+    print(f"Exporting {len(devices)} devices to {args.out} with {args.workers} workers...")
+
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        futures = {
+            executor.submit(
+                export_device, key, args.url, device_id, args.out, checkpoint,
+                args.page_size, args.rows_per_part, args.row_group_size, timedelta(days=args.lookback_days)
+            ): device_id
+            for device_id in devices
+        }
+        failed = []
+        for future in as_completed(futures):
+            device_id = futures[future]
+            try:
+                rows = future.result()
+                progress = checkpoint.get(device_id)
+                print(f"Device {device_id}: {rows} new rows ({progress['rows']} total, up to {progress['cursor']}).")
+            except Exception as e:
+                failed.append(device_id)
+                print(f"Error: Device {device_id} export failed: {e}. Rerun to resume.")
+
+    if failed:
+        sys.exit(1)
+    print("Export complete.")
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\nInterrupted. Rerun to resume from the last checkpoint.")
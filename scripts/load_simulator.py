@@ -0,0 +1,194 @@
+import os
+import sys
+import time
+import random
+import argparse
+import threading
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from synthetic import synthetic_reading
+from encoding import encode_sample, encode_batch
+
+# Simulates a fleet of devices driving the insert-sample path, in accelerated time.
+# Each virtual device samples every 15 (virtual) minutes. Devices randomly lose their
+# uplink for a while and queue samples, then flush the backlog when they reconnect,
+# producing the bursts seen after real outages. Run against scripts/supabase_stand_in.py:
+#
+#   python scripts/supabase_stand_in.py --days 0 --row-cost-ms 2 --drop-response-rate 0.02
+#   python scripts/load_simulator.py --devices 200 --speedup 900 --duration 60
+
+SAMPLING_INTERVAL = 15 * 60  # virtual seconds
+
+class Results:
+    """Client-side measurements shared by all virtual devices."""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = []
+        self.requests = 0
+        self.failures = 0
+        self.retries = 0
+        self.samples_sent = 0
+        self.samples_dropped = 0
+        self.largest_burst = 0
+
+    def record(self, latency, samples, ok):
+        with self.lock:
+            self.latencies.append(latency)
+            self.requests += 1
+            if ok:
+                self.samples_sent += samples
+            else:
+                self.failures += 1
+
+class VirtualDevice(threading.Thread):
+    def __init__(self, device_id, args, results, start_time, stop):
+        super().__init__(daemon=True)
+        self.device_id = device_id
+        self.args = args
+        self.results = results
+        self.start_time = start_time
+        self.stop = stop
+        self.session = requests.Session()
+        self.headers = {"Authorization": "Bearer stand-in", "Content-Type": "application/json"}
+        self.backlog = []
+        self.outage_ticks = 0
+
+    def virtual_now(self):
+        return self.start_time + timedelta(seconds=(time.monotonic() - self.started) * self.args.speedup)
+
+    def post(self, body, samples, gzip=False):
+        """POST with the sampler's retry policy. :return: True if the server accepted the samples"""
+        headers = dict(self.headers, **({"Content-Encoding": "gzip"} if gzip else {}))
+        for attempt in range(self.args.retries):
+            start = time.perf_counter()
+            try:
+                response = self.session.post(self.args.url, data=body, headers=headers, timeout=self.args.timeout)
+                ok = response.status_code == 200
+            except requests.RequestException:
+                ok = False
+            self.results.record(time.perf_counter() - start, samples, ok)
+            if ok:
+                return True
+            if attempt < self.args.retries - 1:
+                with self.results.lock:
+                    self.results.retries += 1
+                time.sleep(self.args.backoff * (2 ** attempt))
+        return False
+
+    def flush(self):
+        """Send the backlog, one sample per request or in compressed batches."""
+        with self.results.lock:
+            self.results.largest_burst = max(self.results.largest_burst, len(self.backlog))
+
+        pending, self.backlog = self.backlog, []
+        while pending and not self.stop.is_set():
+            if self.args.batch > 1:
+                chunk = pending[:self.args.batch]
+                ok = self.post(encode_batch(chunk), len(chunk), gzip=True)
+            else:
+                chunk = pending[:1]
+                ok = self.post(encode_sample(chunk[0]), 1)
+            if not ok:
+                with self.results.lock:
+                    self.results.samples_dropped += len(chunk)
+            pending = pending[len(chunk):]
+
+    def run(self):
+        self.started = time.monotonic()
+        tick_period = SAMPLING_INTERVAL / self.args.speedup
+        # Devices boot at random phases within one interval
+        next_tick = self.started + random.uniform(0, tick_period)
+
+        while not self.stop.is_set():
+            delay = next_tick - time.monotonic()
+            if delay > 0 and self.stop.wait(delay):
+                break
+            next_tick += tick_period
+
+            reading = synthetic_reading(
+                self.device_id, self.virtual_now().isoformat(), (time.monotonic() - self.started) * self.args.speedup
+            )
+            self.backlog.append(reading)
+
+            if self.outage_ticks > 0:
+                self.outage_ticks -= 1
+                continue
+            if random.random() < self.args.outage_rate:
+                # Outage lengths are exponentially distributed around the mean
+                self.outage_ticks = max(1, int(random.expovariate(1 / self.args.outage_ticks)))
+                continue
+            self.flush()
+
+def percentile_ms(values, q):
+    return np.percentile(values, q) * 1000 if values else float('nan')
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate a fleet of devices sending samples to insert-sample.")
+    parser.add_argument('--url', default="http://127.0.0.1:54321/functions/v1/insert-sample")
+    parser.add_argument('--devices', type=int, default=100, help="Number of virtual devices")
+    parser.add_argument('--duration', type=float, default=60, help="Wall-clock seconds to run")
+    parser.add_argument('--speedup', type=float, default=900, help="Virtual seconds per real second (900: one tick per second)")
+    parser.add_argument('--outage-rate', type=float, default=0.01, help="Probability per tick that a device loses its uplink")
+    parser.add_argument('--outage-ticks', type=float, default=16, help="Mean outage length in ticks")
+    parser.add_argument('--batch', type=int, default=1, help="Max samples per request (1: current one-sample path)")
+    parser.add_argument('--retries', type=int, default=5, help="Attempts per request, as in send_sample")
+    parser.add_argument('--backoff', type=float, default=0.05, help="Base retry backoff in real seconds")
+    parser.add_argument('--timeout', type=float, default=10, help="Request timeout in seconds")
+    parser.add_argument('--device-id-offset', type=int, default=1000, help="First virtual device ID")
+    args = parser.parse_args()
+
+    stats_url = args.url.split('/functions/')[0] + '/stats'
+    try:
+        requests.post(stats_url, timeout=5)
+    except requests.RequestException:
+        stats_url = None  # Not the stand-in; server-side counters unavailable
+
+    results = Results()
+    stop = threading.Event()
+    start_time = datetime.now(timezone.utc)
+    devices = [
+        VirtualDevice(args.device_id_offset + i, args, results, start_time, stop)
+        for i in range(args.devices)
+    ]
+
+    print(f"Simulating {args.devices} devices for {args.duration:.0f} s "
+          f"({args.duration * args.speedup / 3600:.1f} virtual hours, batch size {args.batch})...")
+    wall_start = time.monotonic()
+    for device in devices:
+        device.start()
+    time.sleep(args.duration)
+    stop.set()
+    for device in devices:
+        device.join(timeout=args.timeout + 1)
+    elapsed = time.monotonic() - wall_start
+
+    queued = sum(len(device.backlog) for device in devices)
+    with results.lock:
+        latencies = list(results.latencies)
+
+    print("-" * 72)
+    print(f"Requests:          {results.requests} ({results.requests / elapsed:.1f}/s), "
+          f"{results.failures} failed, {results.retries} retries")
+    print(f"Samples delivered: {results.samples_sent} ({results.samples_sent / elapsed:.1f}/s), "
+          f"{results.samples_dropped} dropped, {queued} still queued")
+    print(f"Latency (ms):      p50 {percentile_ms(latencies, 50):.1f}, p95 {percentile_ms(latencies, 95):.1f}, "
+          f"p99 {percentile_ms(latencies, 99):.1f}, max {percentile_ms(latencies, 100):.1f}")
+    print(f"Largest burst:     {results.largest_burst} samples after an outage")
+
+    if stats_url:
+        server = requests.get(stats_url, timeout=5).json()
+        rate = server['duplicates'] / server['samples'] if server['samples'] else 0.0
+        print(f"Server:            {server['inserted']} inserted, {server['duplicates']} duplicates "
+              f"({rate:.2%}), {server['errors']} rejected, {server['dropped_responses']} responses dropped")
+    print("-" * 72)
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\nInterrupted.")
@@ -0,0 +1,299 @@
+import os
+import sys
+import json
+import time
+import bisect
+import random
+import argparse
+import threading
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from synthetic import synthetic_reading
+from encoding import decode
+
+# Local stand-in for the parts of Supabase the sensor system talks to, for testing tools
+# without touching the production project. Implements just enough of PostgREST for keyset
+# paging of `samples`, plus the `insert-sample` edge function:
+#   GET  /rest/v1/devices?select=id
+#   GET  /rest/v1/samples?device_id=eq.1&measured_at=gt.<timestamp>&id=gt.<id>&order=measured_at.asc&limit=1000
+#   POST /functions/v1/insert-sample  (JSON, compact or gzip batch payloads, see encoding.py)
+#   POST /functions/v1/update-prediction
+#   GET  /stats                       (insert counters for load testing; POST /stats resets them)
+
+def to_db_timestamp(measured_at):
+    """Normalise to how Postgres returns a `timestamp` column: naive UTC with microseconds."""
+    dt = datetime.fromisoformat(measured_at)
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt.isoformat(timespec='microseconds')
+
+class SampleStore:
+    """In-memory `samples` table with the (device_id, measured_at) unique constraint."""
+    def __init__(self):
+        self.rows = {}  # device_id -> rows sorted by measured_at
+        self.keys = {}  # device_id -> sorted measured_at strings, for bisect
+        self.next_id = 1
+        self.lock = threading.Lock()
+
+    def upsert(self, reading):
+        """
+        Insert a reading, ignoring it if (device_id, measured_at) already exists.
+        :return: True if inserted, False if it was a duplicate
+        """
+        device_id = int(reading.device_id)
+        measured_at = to_db_timestamp(reading.measured_at)
+        with self.lock:
+            keys = self.keys.setdefault(device_id, [])
+            rows = self.rows.setdefault(device_id, [])
+            i = bisect.bisect_left(keys, measured_at)
+            if i < len(keys) and keys[i] == measured_at:
+                return False
+            row = {
+                'id': self.next_id,
+                'created_at': datetime.now(timezone.utc).replace(tzinfo=None).isoformat(timespec='microseconds'),
+                **reading.to_dict(),
+                'device_id': device_id,
+                'measured_at': measured_at,
+            }
+            self.next_id += 1
+            keys.insert(i, measured_at)
+            rows.insert(i, row)
+            return True
+
+    def update_prediction(self, device_id, measured_at, value):
+        """
+        Set predicted_dissolved_oxygen on an existing row.
+        :return: True if the row exists
+        """
+        measured_at = to_db_timestamp(measured_at)
+        with self.lock:
+            keys = self.keys.get(int(device_id), [])
+            i = bisect.bisect_left(keys, measured_at)
+            if i == len(keys) or keys[i] != measured_at:
+                return False
+            self.rows[int(device_id)][i]['predicted_dissolved_oxygen'] = value
+            return True
+
+    def devices(self):
+        with self.lock:
+            return sorted(self.rows)
+
+    def page(self, device_id, after=None, inclusive=False, limit=1000, min_id=None):
+        with self.lock:
+            keys = self.keys.get(device_id, [])
+            if after is None:
+                start = 0
+            elif inclusive:
+                start = bisect.bisect_left(keys, after)
+            else:
+                start = bisect.bisect_right(keys, after)
+            rows = self.rows.get(device_id, [])
+            if min_id is None:
+                return rows[start:start + limit]
+            page = []
+            for row in rows[start:]:
+                if row['id'] > min_id:
+                    page.append(row)
+                    if len(page) == limit:
+                        break
+            return page
+
+class InsertStats:
+    """Counters for the insert-sample and update-prediction endpoints."""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.requests = 0
+            self.errors = 0
+            self.samples = 0
+            self.inserted = 0
+            self.duplicates = 0
+            self.dropped_responses = 0
+            self.updates = 0
+            self.updates_missed = 0
+
+    def record(self, inserted, duplicates, error=False):
+        with self.lock:
+            self.requests += 1
+            self.errors += error
+            self.samples += inserted + duplicates
+            self.inserted += inserted
+            self.duplicates += duplicates
+
+    def record_dropped_response(self):
+        with self.lock:
+            self.dropped_responses += 1
+
+    def record_update(self, found):
+        with self.lock:
+            self.updates += found
+            self.updates_missed += not found
+
+    def to_dict(self):
+        with self.lock:
+            return {
+                'requests': self.requests,
+                'errors': self.errors,
+                'samples': self.samples,
+                'inserted': self.inserted,
+                'duplicates': self.duplicates,
+                'dropped_responses': self.dropped_responses,
+                'updates': self.updates,
+                'updates_missed': self.updates_missed,
+            }
+
+class StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # Accept bursts from many simulated devices
+
+def make_handler(store, stats, latency, row_cost, insert_slots, drop_response_rate=0.0):
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            url = urlparse(self.path)
+            body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+
+            if url.path == '/stats':
+                stats.reset()
+                return self._send(200, {'success': True})
+
+            if url.path == '/functions/v1/update-prediction':
+                return self._update_prediction(body)
+
+            if url.path != '/functions/v1/insert-sample':
+                return self._send(404, {'message': 'Not found'})
+
+            try:
+                readings = decode(body)
+                if any(r.device_id is None or r.measured_at is None or r.uptime is None for r in readings):
+                    stats.record(0, 0, error=True)
+                    return self._send(400, {'error': 'Missing required fields'})
+            except Exception:
+                stats.record(0, 0, error=True)
+                return self._send(400, {'error': 'Invalid request'})
+
+            # Model the edge function: fixed request latency plus per-row database cost,
+            # with at most `insert_slots` requests executing at once
+            time.sleep(latency)
+            with insert_slots:
+                time.sleep(row_cost * len(readings))
+                inserted = sum(store.upsert(reading) for reading in readings)
+            stats.record(inserted, len(readings) - inserted)
+
+            # Model a response lost after the insert committed (dropped uplink, gateway timeout):
+            # the client sees a connection error and retries, producing upsert duplicates
+            if random.random() < drop_response_rate:
+                stats.record_dropped_response()
+                self.close_connection = True
+                return
+            self._send(200, {'success': True})
+
+        def _update_prediction(self, body):
+            try:
+                update = json.loads(body)
+                device_id, measured_at = update['device_id'], update['measured_at']
+                value = update['predicted_dissolved_oxygen']
+                if not device_id or not measured_at or value is None:
+                    raise KeyError('predicted_dissolved_oxygen')
+            except (ValueError, KeyError):
+                return self._send(400, {'error': 'Missing required fields'})
+
+            time.sleep(latency)
+            # Like the real function, updating a missing row is not an error
+            stats.record_update(store.update_prediction(device_id, measured_at, value))
+            self._send(200, {'success': True})
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            query = {k: v[0] for k, v in parse_qs(url.query).items()}
+
+            if url.path == '/stats':
+                return self._send(200, stats.to_dict())
+
+            time.sleep(latency)
+
+            if url.path == '/rest/v1/devices':
+                return self._send(200, [{'id': device_id} for device_id in store.devices()])
+
+            if url.path == '/rest/v1/samples':
+                try:
+                    op, device_id = query['device_id'].split('.', 1)
+                    if op != 'eq':
+                        raise ValueError(op)
+                    after, inclusive = None, False
+                    if 'measured_at' in query:
+                        op, after = query['measured_at'].split('.', 1)
+                        if op not in ('gt', 'gte'):
+                            raise ValueError(op)
+                        after, inclusive = to_db_timestamp(after), op == 'gte'
+                    min_id = None
+                    if 'id' in query:
+                        op, min_id = query['id'].split('.', 1)
+                        if op != 'gt':
+                            raise ValueError(op)
+                        min_id = int(min_id)
+                    if query.get('order', 'measured_at.asc') != 'measured_at.asc':
+                        raise ValueError(query['order'])
+                    limit = int(query.get('limit', 1000))
+                except (KeyError, ValueError) as e:
+                    return self._send(400, {'message': f'Unsupported query: {e}'})
+                return self._send(200, store.page(int(device_id), after, inclusive, limit, min_id))
+
+            self._send(404, {'message': 'Not found'})
+
+        def _send(self, status, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+def seed(store, devices, days, interval=15):
+    """Fill the store with `days` of synthetic samples per device at `interval` minutes."""
+    start = datetime.now(timezone.utc) - timedelta(days=days)
+    count = days * 24 * 60 // interval
+    for device_id in range(1, devices + 1):
+        for i in range(count):
+            measured_at = (start + timedelta(minutes=interval * i)).isoformat()
+            store.upsert(synthetic_reading(device_id, measured_at, interval * 60.0 * i))
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the Supabase REST API and edge functions.")
+    parser.add_argument('--port', type=int, default=54321)
+    parser.add_argument('--devices', type=int, default=3, help="Number of devices to seed")
+    parser.add_argument('--days', type=int, default=30, help="Days of 15 minute samples to seed per device")
+    parser.add_argument('--latency-ms', type=float, default=0, help="Artificial latency added to every request")
+    parser.add_argument('--row-cost-ms', type=float, default=0, help="Artificial database time per inserted row")
+    parser.add_argument('--max-concurrent-inserts', type=int, default=16, help="Inserts executing at once; the rest queue")
+    parser.add_argument('--drop-response-rate', type=float, default=0.0, help="Fraction of inserts whose response is lost after committing")
+    args = parser.parse_args()
+
+    store = SampleStore()
+    seed(store, args.devices, args.days)
+    print(f"Seeded {args.devices} devices with {args.days} days of samples.")
+
+    handler = make_handler(
+        store, InsertStats(), args.latency_ms / 1000, args.row_cost_ms / 1000,
+        threading.BoundedSemaphore(args.max_concurrent_inserts), args.drop_response_rate
+    )
+    server = StandInServer(('127.0.0.1', args.port), handler)
+    print(f"Supabase stand-in listening on http://127.0.0.1:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopped.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+import os
+import sys
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from reading import Reading
+
+SENSORS = ['turbidity', 'total_dissolved_solids', 'ph']
+
+def synthetic_reading(device_id, measured_at, uptime, num_samples=200):
+    """
+    Generate a Reading shaped like real sampler output, including the occasional failed channel.
+    :param device_id: Device ID to stamp on the reading
+    :param measured_at: ISO 8601 measurement timestamp
+    :param uptime: Device uptime in seconds
+    :param num_samples: ADC samples per channel, used to quantise the success rate
+    """
+    reading = Reading(
+        device_id=device_id,
+        measured_at=measured_at,
+        uptime=uptime,
+        turbidity=random.uniform(0, 50),
+        temperature=round(random.uniform(15, 25) / 0.125) * 0.125,  # DS18B20 11-bit steps
+        total_dissolved_solids=random.uniform(100, 600),
+        ph=random.uniform(6.5, 8.5),
+    )
+    for sensor in SENSORS:
+        success_rate = random.randint(int(0.8 * num_samples), num_samples) / num_samples
+        attempts = random.choice([1, 1, 1, 1, 2, 3])
+        reading.set_diagnostics(sensor, {
+            'voltage': random.uniform(0.5, 4.5),
+            'rsd': random.uniform(0.0001, 0.012),
+            'success_rate': success_rate,
+            'attempts': attempts,
+        })
+        # A channel that needed every attempt failed its stability checks
+        if attempts == 3 and random.random() < 0.5:
+            setattr(reading, sensor, None)
+    return reading
@@ -1,37 +1,104 @@
 import numpy as np
 from random import randint
-from time import sleep
+from time import monotonic, sleep
 import board
 import busio
 import adafruit_ads1x15.ads1115 as ADS
+from adafruit_ads1x15.ads1x15 import Mode
 from adafruit_ads1x15.analog_in import AnalogIn
 import json
 import os
 import glob
+from reading import Reading
+from logs import get_logger
+
+log = get_logger('sensors')
+
+# DS18B20 conversion time in seconds for each resolution in bits
+TEMPERATURE_CONVERSION_TIMES = {9: 0.09375, 10: 0.1875, 11: 0.375, 12: 0.75}
+
+# ADC acquisition defaults for channels without measured parameters (see tune.py)
+DEFAULT_NUM_SAMPLES = 200
+DEFAULT_SAMPLING_INTERVAL = 0.01  # seconds
 
 class Sensors:
-    def __init__(self):
+    def __init__(self, temperature_resolution=11):
         with open('data/calibration.json', 'r') as f:
             self.coeffs = json.load(f)
 
+        # Per-sensor sample counts and spacing measured by tune.py
+        self.acquisition = {}
+        if os.path.isfile('data/acquisition.json'):
+            with open('data/acquisition.json', 'r') as f:
+                self.acquisition = json.load(f)
+
         i2c = busio.I2C(board.SCL, board.SDA)
         self.ads = ADS.ADS1115(i2c)
         self.ads.gain = 2/3
+        # Single-shot (the library default, set explicitly): the ADS1115 powers down after each
+        # conversion. Reads rewrite the config, which also returns a chip left converting
+        # continuously by another program to power-down
+        self.ads.mode = Mode.SINGLE
 
         self.TURBIDITY_CHANNEL = ADS.P1
         self.TOTAL_DISSOLVED_SOLIDS_CHANNEL = ADS.P2
         self.PH_CHANNEL = ADS.P0
 
+        self.analog_inputs = {}
+
         # Mount the temperature probe
         os.system('modprobe w1-gpio')
         os.system('modprobe w1-therm')
 
         base_dir = '/sys/bus/w1/devices/'
         # Get all the filenames begin with 28 in the path base_dir.
-        device_folder = glob.glob(base_dir + '28*')[0]
-        self.device_file = device_folder + '/w1_slave'
+        # The first probe is the one reported as the sample's temperature.
+        self.device_folders = sorted(glob.glob(base_dir + '28*'))
+        self.device_file = self.device_folders[0] + '/w1_slave'
+
+        # Kernel w1_therm bulk read: one write converts on every probe on the bus at once
+        self.bulk_read_file = base_dir + 'w1_bus_master1/therm_bulk_read'
+        if not os.path.exists(self.bulk_read_file):
+            log.warning("w1 bulk read not supported by this kernel, probes will convert one at a time")
+            self.bulk_read_file = None
+        self.conversion_started = None
+
+        self.temperature_resolution = temperature_resolution
+        self._set_temperature_resolution(temperature_resolution)
+
+    def _set_temperature_resolution(self, bits):
+        """
+        Set the conversion resolution of every probe (9-12 bits, 0.5-0.0625 °C).
+        Lower resolutions convert faster: 94 ms at 9 bits up to 750 ms at 12 bits.
+        """
+        for folder in self.device_folders:
+            try:
+                with open(folder + '/resolution', 'r') as f:
+                    if int(f.read()) == bits:
+                        continue
+                with open(folder + '/resolution', 'w') as f:
+                    f.write(str(bits))
+            except (OSError, ValueError) as e:
+                log.warning("Could not set probe resolution", probe=os.path.basename(folder), bits=bits, error=e)
+
+    def _analog_input(self, channel):
+        """Return a cached AnalogIn for the channel, creating it on first use."""
+        if channel not in self.analog_inputs:
+            self.analog_inputs[channel] = AnalogIn(self.ads, channel)
+        return self.analog_inputs[channel]
+
+    def _acquisition_params(self, sensor):
+        """
+        Return the tuned (num_samples, sampling_interval) for a sensor, or the defaults if untuned.
+        :param sensor: Sensor key in acquisition.json ('turbidity', 'total_dissolved_solids', 'ph')
+        """
+        params = self.acquisition.get(sensor, {})
+        return (
+            params.get('num_samples', DEFAULT_NUM_SAMPLES),
+            params.get('sampling_interval', DEFAULT_SAMPLING_INTERVAL)
+        )
 
-    def read_adc_average(self, channel, num_samples=200, sampling_interval=0.01, rsd_tolerance=0.01, num_attempts=3):
+    def read_adc_average(self, channel, num_samples=DEFAULT_NUM_SAMPLES, sampling_interval=DEFAULT_SAMPLING_INTERVAL, rsd_tolerance=0.01, num_attempts=3):
         """
         Read the ADC channel and return the average voltage with stability checks.
         :param channel: The ADS channel to read from (ADS.P0, ADS.P1, etc.)
@@ -41,79 +108,202 @@ class Sensors:
         :param num_attempts: Number of attempts to read the channel if stability checks fail
         :return: Dict with voltage, rsd, success_rate, attempts, and success flag
         """
-        analog_input = AnalogIn(self.ads, channel)
-        last_attempt_data = None
+        return self.read_adc_scan([channel], num_samples, sampling_interval, rsd_tolerance, num_attempts)[0]
+
+    def read_adc_scan(self, channels, num_samples=DEFAULT_NUM_SAMPLES, sampling_interval=DEFAULT_SAMPLING_INTERVAL, rsd_tolerance=0.01, num_attempts=3):
+        """
+        Read several ADC channels in a single interleaved pass with stability checks.
+        Channels are sampled round-robin into one (channels x samples) array, so their averages
+        overlap in time. A channel with a longer sampling interval than the fastest one is read
+        every few rounds, and a channel stops once it has its samples. Only channels that fail
+        the checks are re-scanned.
+        :param channels: List of ADS channels to read from (ADS.P0, ADS.P1, etc.)
+        :param num_samples: Number of samples to take per channel, or a list with one per channel
+        :param sampling_interval: Time between a channel's samples in seconds, or a list with one per channel
+        :param rsd_tolerance: Relative standard deviation tolerance for stability
+        :param num_attempts: Number of attempts to read a channel if stability checks fail
+        :return: List of dicts with voltage, rsd, success_rate, attempts, and success flag, in channel order
+        """
+        counts = np.broadcast_to(np.asarray(num_samples, dtype=int), len(channels))
+        intervals = np.broadcast_to(np.asarray(sampling_interval, dtype=float), len(channels))
+        round_interval = intervals.min()
+        if round_interval > 0:
+            strides = np.maximum(np.rint(intervals / round_interval), 1).astype(int)
+        else:
+            strides = np.ones(len(channels), dtype=int)
+
+        results = [None] * len(channels)
+        pending = list(range(len(channels)))
+        # Failed readings, and slots past a channel's sample count, are left as NaN
+        samples = np.empty((len(channels), counts.max()))
 
         for attempt in range(num_attempts):
-            # Collect samples
-            samples = []
-            for _ in range(num_samples):
-                try:
-                    samples.append(analog_input.voltage)
-                except Exception:
-                    pass  # Silently skip failed readings
-                sleep(sampling_interval)
-
-            # Calculate metrics for this attempt
-            success_rate = len(samples) / num_samples
-            mean = np.mean(samples) if samples else 0.0
-            rsd = self._calculate_rsd(samples, mean) if len(samples) > 1 else float('inf')
-
-            attempt_data = {
-                'voltage': mean if samples else None,
-                'rsd': rsd,
-                'success_rate': success_rate,
-                'attempts': attempt + 1,
-                'success': False
-            }
-
-            # Check if this attempt meets quality criteria
-            if success_rate >= 0.8 and rsd <= rsd_tolerance:
-                attempt_data['success'] = True
-                print(f"Successfully read channel {channel}. Mean: {mean:.4f} V, RSD: {rsd * 100:.2f}%, Success Rate: {success_rate:.2f}")
-                return attempt_data
-
-            # Store failed attempt data
-            last_attempt_data = attempt_data
-            if success_rate < 0.8:
-                print(f"Warning: Low success rate ({success_rate:.2f}) for channel {channel}. Retrying...")
-            else:
-                print(f"Warning: High RSD ({rsd * 100:.2f}%) for channel {channel}. Retrying...")
-
-        # All attempts failed - return the last attempt's data
-        print(f"Error: Failed to read from channel {channel} after {num_attempts} attempts.")
-        if last_attempt_data:
-            last_attempt_data['attempts'] = num_attempts
-            return last_attempt_data
-
-        # Fallback if no samples were ever collected
-        return {
-            'voltage': None,
-            'rsd': None,
-            'success_rate': 0.0,
-            'attempts': num_attempts,
-            'success': False
-        }
-
-    def _calculate_rsd(self, samples, mean):
-        """Calculate relative standard deviation, handling edge cases."""
-        if len(samples) <= 1 or abs(mean) < 1e-6:
-            return float('inf')
-        stdev = np.std(samples, ddof=1)
-        return stdev / mean
-
-    def read_temperature_raw(self, num_attempts=3):
-        for _ in range(num_attempts):
-            with open(self.device_file, 'r') as f:
+            inputs = [self._analog_input(channels[i]) for i in pending]
+            block = samples[:len(pending), :counts[pending].max()]
+            block.fill(np.nan)
+
+            # Which pending channels are read in each round, and into which sample slot
+            rounds = max(counts[i] * strides[i] for i in pending)
+            schedule = [
+                [(k, r // strides[i]) for k, i in enumerate(pending) if r % strides[i] == 0 and r // strides[i] < counts[i]]
+                for r in range(rounds)
+            ]
+
+            # Collect samples round by round
+            for reads in schedule:
+                for k, j in reads:
+                    try:
+                        block[k, j] = inputs[k].voltage
+                    except Exception:
+                        pass  # Silently skip failed readings
+                sleep(round_interval)
+
+            # Calculate metrics for this attempt, for all channels at once
+            success_rates, means, rsds = self._scan_stats(block, counts[pending])
+
+            still_pending = []
+            for k, i in enumerate(pending):
+                channel = channels[i]
+                success_rate, mean, rsd = float(success_rates[k]), float(means[k]), float(rsds[k])
+
+                attempt_data = {
+                    'voltage': mean if success_rate > 0 else None,
+                    'rsd': rsd,
+                    'success_rate': success_rate,
+                    'attempts': attempt + 1,
+                    'success': False
+                }
+                results[i] = attempt_data
+
+                # Check if this attempt meets quality criteria
+                if success_rate >= 0.8 and rsd <= rsd_tolerance:
+                    attempt_data['success'] = True
+                    log.debug("Read channel", channel=channel, mean=mean, rsd=rsd, success_rate=success_rate, attempt=attempt + 1)
+                    continue
+
+                still_pending.append(i)
+                if success_rate < 0.8:
+                    log.warning("Low success rate, retrying", channel=channel, success_rate=success_rate, attempt=attempt + 1)
+                else:
+                    log.warning("High RSD, retrying", channel=channel, rsd=rsd, attempt=attempt + 1)
+
+            pending = still_pending
+            if not pending:
+                break
+
+        # Channels that failed every attempt keep their last attempt's data
+        for i in pending:
+            log.error("Failed to read channel", channel=channels[i], attempts=num_attempts, rsd=results[i]['rsd'], success_rate=results[i]['success_rate'])
+            results[i]['attempts'] = num_attempts
+
+        return results
+
+    def _scan_stats(self, block, num_samples=None):
+        """
+        Vectorised per-channel success rate, mean and relative standard deviation of a
+        (channels x samples) array with NaN for failed readings. The RSD is infinite when a
+        channel has fewer than two readings or a mean too close to zero.
+        :param num_samples: Samples attempted per channel (defaults to the block width)
+        """
+        valid = ~np.isnan(block)
+        counts = valid.sum(axis=1)
+        success_rates = counts / (block.shape[1] if num_samples is None else num_samples)
+
+        safe_counts = np.maximum(counts, 1)
+        means = np.where(valid, block, 0.0).sum(axis=1) / safe_counts
+        deviations = np.where(valid, block - means[:, None], 0.0)
+        stdevs = np.sqrt((deviations ** 2).sum(axis=1) / np.maximum(counts - 1, 1))
+
+        stable = (counts > 1) & (np.abs(means) >= 1e-6)
+        rsds = np.full(len(block), float('inf'))
+        np.divide(stdevs, means, out=rsds, where=stable)
+        return success_rates, means, rsds
+
+    def read_temperature_raw(self, num_attempts=3, device_file=None):
+        device_file = device_file or self.device_file
+        for attempt in range(num_attempts):
+            with open(device_file, 'r') as f:
                 lines = f.readlines()
             if lines[0].strip()[-3:] == 'YES':
-                print("Successfully read temperature sensor.")
+                log.debug("Read temperature probe", probe=os.path.basename(os.path.dirname(device_file)))
                 return lines
-            print("Warning: Temperature read failed, retrying...")
+            log.warning("Temperature CRC check failed, retrying", probe=os.path.basename(os.path.dirname(device_file)), attempt=attempt + 1)
             sleep(0.2)
-        print(f"Error: Temperature read failed after {num_attempts} attempts. Discarding reading.")
+        log.error("Temperature read failed, discarding reading", probe=os.path.basename(os.path.dirname(device_file)), attempts=num_attempts)
         return None
 
+    def start_temperature_conversion(self):
+        """
+        Trigger one conversion on every probe on the bus and return without waiting.
+        Read the results later with read_temperatures; meanwhile the ADC can be sampled.
+        :return: True if a bulk conversion was started
+        """
+        if self.bulk_read_file is None:
+            return False
+        try:
+            with open(self.bulk_read_file, 'w') as f:
+                f.write('trigger')
+        except OSError as e:
+            log.warning("Could not trigger bulk temperature conversion", error=e)
+            return False
+        self.conversion_started = monotonic()
+        return True
+
+    def _wait_for_conversion(self):
+        """Wait for a pending bulk conversion to finish, sleeping only for the time left."""
+        conversion_time = TEMPERATURE_CONVERSION_TIMES.get(self.temperature_resolution, 0.75)
+        remaining = self.conversion_started + conversion_time - monotonic()
+        if remaining > 0:
+            sleep(remaining)
+
+        # therm_bulk_read reads -1 while any probe is still converting
+        deadline = monotonic() + conversion_time
+        while monotonic() < deadline:
+            with open(self.bulk_read_file, 'r') as f:
+                if f.read().strip() != '-1':
+                    return
+            sleep(0.01)
+
+    def read_temperatures(self, num_attempts=3, device_folders=None):
+        """
+        Read every temperature probe on the bus.
+        Uses the results of a bulk conversion started with start_temperature_conversion (one is
+        started now if none is pending), so all probes cost about one conversion time in total.
+        Probes whose bulk result cannot be read fall back to an individual conversion.
+        :param num_attempts: Number of attempts per probe for the individual fallback
+        :param device_folders: Probe folders to read (defaults to every probe on the bus)
+        :return: Dict mapping probe ID (e.g. '28-0123456789ab') to temperature in Celsius or None
+        """
+        bulk = self.conversion_started is not None or self.start_temperature_conversion()
+        if bulk:
+            self._wait_for_conversion()
+            self.conversion_started = None
+
+        temperatures = {}
+        for folder in device_folders or self.device_folders:
+            probe = os.path.basename(folder)
+            if bulk:
+                try:
+                    # Returns the bulk result without starting another conversion
+                    with open(folder + '/temperature', 'r') as f:
+                        temperatures[probe] = float(f.read()) / 1000.0
+                    continue
+                except (OSError, ValueError):
+                    log.warning("Bulk temperature read failed, converting individually", probe=probe)
+            temperatures[probe] = self._parse_temperature(self.read_temperature_raw(num_attempts, folder + '/w1_slave'))
+        return temperatures
+
+    def _calibrate(self, sensor, adc_data):
+        """
+        Apply a sensor's calibration coefficients to a stability-checked ADC reading.
+        :param sensor: Sensor key in calibration.json ('turbidity', 'total_dissolved_solids', 'ph')
+        :param adc_data: Diagnostic dict from read_adc_average or read_adc_scan
+        :return: Calibrated value or None if the reading failed
+        """
+        if adc_data['voltage'] is None or not adc_data['success']:
+            return None
+        return np.polyval(self.coeffs[sensor]['coeffs'], adc_data['voltage'])
+
     def read_turbidity(self):
         """
         Read the turbidity sensor value.
@@ -121,21 +311,20 @@ class Sensors:
         the calibration coefficients to convert it to a turbidity value.
         :return: Tuple of (turbidity_value, diagnostic_data) or (None, diagnostic_data)
         """
-        adc_data = self.read_adc_average(self.TURBIDITY_CHANNEL)
-        if adc_data['voltage'] is None or not adc_data['success']:
-            return None, adc_data
-        turbidity_coeffs = self.coeffs['turbidity']['coeffs']
-        turbidity_value = np.polyval(turbidity_coeffs, adc_data['voltage'])
-        return turbidity_value, adc_data
+        adc_data = self.read_adc_average(self.TURBIDITY_CHANNEL, *self._acquisition_params('turbidity'))
+        return self._calibrate('turbidity', adc_data), adc_data
 
     def read_temperature(self):
         """
         Read the temperature sensor value.
-        This method reads the temperature from the 1-Wire temperature sensor.
+        This method reads the temperature from the first 1-Wire temperature probe.
         :return: Temperature in Celsius or None if reading failed
         """
-        lines = self.read_temperature_raw()
+        primary = self.device_folders[0]
+        return self.read_temperatures(device_folders=[primary])[os.path.basename(primary)]
 
+    def _parse_temperature(self, lines):
+        """Parse the temperature in Celsius from w1_slave lines, or None if the read failed."""
         if lines is None:
             return None
 
@@ -154,12 +343,8 @@ class Sensors:
         the calibration coefficients to convert it to a total dissolved solids value.
         :return: Tuple of (total_dissolved_solids_value, diagnostic_data) or (None, diagnostic_data)
         """
-        adc_data = self.read_adc_average(self.TOTAL_DISSOLVED_SOLIDS_CHANNEL)
-        if adc_data['voltage'] is None or not adc_data['success']:
-            return None, adc_data
-        total_dissolved_solids_coeffs = self.coeffs['total_dissolved_solids']['coeffs']
-        total_dissolved_solids_value = np.polyval(total_dissolved_solids_coeffs, adc_data['voltage'])
-        return total_dissolved_solids_value, adc_data
+        adc_data = self.read_adc_average(self.TOTAL_DISSOLVED_SOLIDS_CHANNEL, *self._acquisition_params('total_dissolved_solids'))
+        return self._calibrate('total_dissolved_solids', adc_data), adc_data
 
     def read_ph(self):
         """
@@ -168,38 +353,30 @@ class Sensors:
         the calibration coefficients to convert it to a pH value.
         :return: Tuple of (ph_value, diagnostic_data) or (None, diagnostic_data)
         """
-        adc_data = self.read_adc_average(self.PH_CHANNEL)
-        if adc_data['voltage'] is None or not adc_data['success']:
-            return None, adc_data
-        ph_coeffs = self.coeffs['ph']['coeffs']
-        ph_value = np.polyval(ph_coeffs, adc_data['voltage'])
-        return ph_value, adc_data
+        adc_data = self.read_adc_average(self.PH_CHANNEL, *self._acquisition_params('ph'))
+        return self._calibrate('ph', adc_data), adc_data
 
     def read_all(self):
         """
         Read all sensors and return their values and diagnostic data.
-        :return: Dict with sensor values and diagnostic data
-        """
-        turbidity, turbidity_diag = self.read_turbidity()
-        temperature = self.read_temperature()
-        total_dissolved_solids, total_dissolved_solids_diag = self.read_total_dissolved_solids()
-        ph, ph_diag = self.read_ph()
-
-        return {
-            'turbidity': turbidity,
-            'temperature': temperature,
-            'total_dissolved_solids': total_dissolved_solids,
-            'ph': ph,
-            'turbidity_voltage': turbidity_diag['voltage'],
-            'turbidity_rsd': turbidity_diag['rsd'],
-            'turbidity_success_rate': turbidity_diag['success_rate'],
-            'turbidity_attempts': turbidity_diag['attempts'],
-            'total_dissolved_solids_voltage': total_dissolved_solids_diag['voltage'],
-            'total_dissolved_solids_rsd': total_dissolved_solids_diag['rsd'],
-            'total_dissolved_solids_success_rate': total_dissolved_solids_diag['success_rate'],
-            'total_dissolved_solids_attempts': total_dissolved_solids_diag['attempts'],
-            'ph_voltage': ph_diag['voltage'],
-            'ph_rsd': ph_diag['rsd'],
-            'ph_success_rate': ph_diag['success_rate'],
-            'ph_attempts': ph_diag['attempts']
-        }
+        The ADC channels are read together in one interleaved scan so the readings are time-coherent,
+        and the temperature probes convert in the background during the scan.
+        :return: Reading with sensor values and diagnostic data (device_id, measured_at and uptime unset)
+        """
+        self.start_temperature_conversion()
+        params = [self._acquisition_params(sensor) for sensor in ('turbidity', 'total_dissolved_solids', 'ph')]
+        turbidity_diag, total_dissolved_solids_diag, ph_diag = self.read_adc_scan(
+            [self.TURBIDITY_CHANNEL, self.TOTAL_DISSOLVED_SOLIDS_CHANNEL, self.PH_CHANNEL],
+            num_samples=[n for n, _ in params],
+            sampling_interval=[interval for _, interval in params]
+        )
+        reading = Reading(
+            turbidity=self._calibrate('turbidity', turbidity_diag),
+            total_dissolved_solids=self._calibrate('total_dissolved_solids', total_dissolved_solids_diag),
+            ph=self._calibrate('ph', ph_diag),
+            temperature=self.read_temperature()
+        )
+        reading.set_diagnostics('turbidity', turbidity_diag)
+        reading.set_diagnostics('total_dissolved_solids', total_dissolved_solids_diag)
+        reading.set_diagnostics('ph', ph_diag)
+        return reading
@@ -0,0 +1,118 @@
+import json
+import os
+import select
+import socket
+from time import monotonic, sleep
+from reading import Reading
+from dotenv import load_dotenv
+from logs import get_logger
+
+# Settings below are read at import, which can happen before the importer loads .env
+load_dotenv()
+
+log = get_logger('stream')
+
+# Unix-domain socket the sampler publishes samples on (relative to the working directory)
+SOCKET_PATH = os.getenv("SAMPLE_SOCKET", "data/sampler.sock")
+
+# Drop a subscriber once this much unsent data has piled up for it
+MAX_PENDING_BYTES = 1024 * 1024
+
+class SamplePublisher:
+    """
+    Publishes Readings as newline-delimited JSON rows (in Reading.FIELDS order) to every connected subscriber.
+    All socket operations are non-blocking so a slow or crashed consumer can never
+    delay acquisition; subscribers that fall too far behind are disconnected.
+    """
+    def __init__(self, path=SOCKET_PATH):
+        self.path = path
+        if os.path.exists(path):
+            os.unlink(path)  # Stale socket from a previous run
+
+        self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.server.bind(path)
+        self.server.listen()
+        self.server.setblocking(False)
+
+        self.pending = {}  # client socket -> bytearray of unsent data
+
+    def _accept(self):
+        while True:
+            try:
+                client, _ = self.server.accept()
+            except BlockingIOError:
+                return
+            client.setblocking(False)
+            self.pending[client] = bytearray()
+
+    def wait_for_subscribers(self, count, timeout):
+        """
+        Block until `count` subscribers are connected or `timeout` seconds pass.
+        Used at startup so the first sample is not published before the consumers connect.
+        :return: Number of connected subscribers
+        """
+        deadline = monotonic() + timeout
+        while len(self.pending) < count:
+            remaining = deadline - monotonic()
+            if remaining <= 0:
+                break
+            select.select([self.server], [], [], remaining)
+            self._accept()
+        return len(self.pending)
+
+    def _drop(self, client):
+        self.pending.pop(client, None)
+        client.close()
+
+    def _flush(self, client):
+        buffer = self.pending[client]
+        try:
+            sent = client.send(buffer)
+            del buffer[:sent]
+        except BlockingIOError:
+            pass
+        except OSError:
+            self._drop(client)
+            return
+        if len(buffer) > MAX_PENDING_BYTES:
+            log.warning("Subscriber fell behind, disconnecting", pending_bytes=len(buffer))
+            self._drop(client)
+
+    def publish(self, reading):
+        """
+        Send a Reading to all subscribers without blocking.
+        :param reading: Reading to publish
+        :return: Number of subscribers the reading was queued for
+        """
+        self._accept()
+        line = (json.dumps(reading.to_row()) + '\n').encode()
+        for client in list(self.pending):
+            self.pending[client] += line
+            self._flush(client)
+        return len(self.pending)
+
+    def close(self):
+        for client in list(self.pending):
+            self._drop(client)
+        self.server.close()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+def subscribe(path=SOCKET_PATH, retry_interval=1):
+    """
+    Yield Readings published by the sampler, reconnecting whenever it restarts.
+    :param path: Path of the sampler's Unix-domain socket
+    :param retry_interval: Seconds to wait between connection attempts
+    """
+    while True:
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.connect(path)
+                log.info("Subscribed", path=path)
+                with sock.makefile('r') as stream:
+                    for line in stream:
+                        yield Reading.from_row(json.loads(line))
+            log.warning("Sampler closed the stream, reconnecting", path=path)
+        except OSError as e:
+            log.warning("Could not connect to sampler, retrying", path=path, retry_interval=retry_interval, error=e)
+        sleep(retry_interval)
@@ -0,0 +1,127 @@
+import json
+import math
+import argparse
+import numpy as np
+from datetime import datetime
+from time import monotonic
+from sensors import Sensors
+
+# Characterise each ADC channel's noise and derive the fewest samples, and the widest useful
+# spacing, that still average to the target precision. The sampler reads the results from
+# data/acquisition.json; rerun after changing probes or when the operating point moves.
+#
+# Consecutive readings are correlated (the ADC and probe filter the signal), so adjacent samples
+# carry less than one sample's worth of information. Samples are spaced out to the lag where the
+# autocorrelation has decayed, and the remaining correlation inflates the required count:
+#   n = (stdev / target)^2 * (1 + rho) / (1 - rho)
+
+SENSORS = {
+    'turbidity': 'TURBIDITY_CHANNEL',
+    'total_dissolved_solids': 'TOTAL_DISSOLVED_SOLIDS_CHANNEL',
+    'ph': 'PH_CHANNEL',
+}
+
+LSB_VOLTS = 6.144 / 32768  # One ADS1115 count at gain 2/3
+DECORRELATION_THRESHOLD = 0.2  # Autocorrelation below which samples are treated as independent
+MAX_RHO = 0.95  # Caps the correlation penalty for channels that never decorrelate
+
+def capture(analog_input, num_samples):
+    """
+    Read a channel back to back as fast as the ADC allows.
+    :return: Tuple of (voltages, mean seconds per reading); failed readings are dropped
+    """
+    voltages = []
+    start = monotonic()
+    for _ in range(num_samples):
+        try:
+            voltages.append(analog_input.voltage)
+        except Exception:
+            pass
+    return np.array(voltages), (monotonic() - start) / num_samples
+
+def autocorrelation(x, max_lag):
+    """Autocorrelation of x at lags 0..max_lag (1.0 at lag 0, 0.0 throughout for a constant signal)."""
+    x = x - x.mean()
+    variance = np.dot(x, x)
+    if variance == 0:
+        return np.concatenate(([1.0], np.zeros(max_lag)))
+    return np.array([1.0] + [np.dot(x[:-lag], x[lag:]) / variance for lag in range(1, max_lag + 1)])
+
+def derive(voltages, read_time, target_rsd, target_volts, min_samples, max_samples, max_lag=50):
+    """
+    Derive acquisition parameters from a back-to-back capture.
+    :param voltages: Captured voltages
+    :param read_time: Seconds per reading during the capture
+    :param target_rsd: Target standard error of the mean, relative to the mean
+    :param target_volts: Target standard error in volts, used when it is looser (near-zero means)
+    :return: Dict of num_samples, sampling_interval and the measured statistics
+    """
+    mean = float(voltages.mean())
+    stdev = float(voltages.std(ddof=1))
+    acf = autocorrelation(voltages, min(max_lag, len(voltages) // 4))
+
+    below = np.nonzero(acf <= DECORRELATION_THRESHOLD)[0]
+    lag = int(below[0]) if len(below) else len(acf) - 1
+    rho = float(np.clip(acf[lag], 0.0, MAX_RHO))
+
+    target = max(target_rsd * abs(mean), target_volts)
+    required = (stdev / target) ** 2 * (1 + rho) / (1 - rho)
+    num_samples = int(np.clip(math.ceil(required), min_samples, max_samples))
+
+    return {
+        'num_samples': num_samples,
+        'sampling_interval': round(lag * read_time, 4),
+        'mean': mean,
+        'stdev': stdev,
+        'autocorrelation': rho,
+        'decorrelation_lag': lag,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure ADC channel noise and tune the sampler's acquisition parameters.")
+    parser.add_argument('--sensors', nargs='*', choices=SENSORS, default=list(SENSORS), help="Sensors to tune (default: all)")
+    parser.add_argument('--capture', type=int, default=2000, help="Readings captured per channel (default: 2000)")
+    parser.add_argument('--target-rsd', type=float, default=0.001, help="Target relative standard error of the mean (default: 0.001)")
+    parser.add_argument('--target-lsb', type=float, default=1, help="Target standard error in ADC counts near 0 V (default: 1)")
+    parser.add_argument('--min-samples', type=int, default=20, help="Fewest samples per reading (default: 20)")
+    parser.add_argument('--max-samples', type=int, default=500, help="Most samples per reading (default: 500)")
+    parser.add_argument('--dry-run', action='store_true', help="Print the parameters without saving them")
+    args = parser.parse_args()
+
+    sensors = Sensors()
+    acquisition = dict(sensors.acquisition)
+
+    print(f"Capturing {args.capture} readings per channel. Keep the probes in a typical sample.")
+    for sensor in args.sensors:
+        analog_input = sensors._analog_input(getattr(sensors, SENSORS[sensor]))
+        voltages, read_time = capture(analog_input, args.capture)
+        if len(voltages) < args.capture // 2:
+            print(f"Error: Only {len(voltages)}/{args.capture} readings succeeded for {sensor}. Skipping.")
+            continue
+
+        params = derive(
+            voltages, read_time, args.target_rsd, args.target_lsb * LSB_VOLTS, args.min_samples, args.max_samples
+        )
+        params['tuned_at'] = datetime.now().isoformat()
+        acquisition[sensor] = params
+
+        window = params['num_samples'] * max(params['sampling_interval'], read_time)
+        print(
+            f"{sensor}: mean {params['mean']:.4f} V, stdev {params['stdev'] * 1000:.3f} mV, "
+            f"decorrelates after {params['decorrelation_lag']} readings (rho {params['autocorrelation']:.2f}) -> "
+            f"{params['num_samples']} samples every {params['sampling_interval'] * 1000:.0f} ms (~{window:.1f} s)"
+        )
+        if abs(params['mean']) >= 1e-6 and params['stdev'] / abs(params['mean']) > 0.01:
+            print(f"Warning: {sensor} RSD is above the sampler's 1% stability tolerance at this operating point.")
+
+    if args.dry_run:
+        return
+    with open('data/acquisition.json', 'w') as f:
+        json.dump(acquisition, f, indent=4)
+    print("Acquisition parameters saved to data/acquisition.json. Restart the sampler to apply them.")
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\nInterrupted. Nothing saved.")